@@ -74,30 +74,34 @@ class ITStudent:
             if level and (not elem.tail or not elem.tail.strip()):
                 elem.tail = i
 
+    @classmethod
+    def _from_element(cls, root: ET.Element):
+        """Create ITStudent from a parsed <Student> element"""
+        name = root.findtext("Name", "").strip()
+        student_id = root.findtext("ID", "").strip()
+        programme = root.findtext("Programme", "").strip()
+        
+        courses = []
+        marks = []
+        
+        for course_el in root.findall("./Courses/Course"):
+            course_name = course_el.findtext("CourseName", "").strip()
+            mark_text = course_el.findtext("Mark", "0").strip()
+            
+            if course_name:  # Only add if course name exists
+                courses.append(course_name)
+                marks.append(int(mark_text))
+        
+        return cls(name, student_id, programme, courses, marks)
+
     @classmethod
     def from_xml_file(cls, path: str):
         """Create ITStudent from XML file with error handling"""
         try:
             tree = ET.parse(path)
-            root = tree.getroot()
-            
-            name = root.findtext("Name", "").strip()
-            student_id = root.findtext("ID", "").strip()
-            programme = root.findtext("Programme", "").strip()
-            
-            courses = []
-            marks = []
-            
-            for course_el in root.findall("./Courses/Course"):
-                course_name = course_el.findtext("CourseName", "").strip()
-                mark_text = course_el.findtext("Mark", "0").strip()
-                
-                if course_name:  # Only add if course name exists
-                    courses.append(course_name)
-                    marks.append(int(mark_text))
-            
-            logger.debug(f"Parsed student from {path}: {name} ({student_id})")
-            return cls(name, student_id, programme, courses, marks)
+            student = cls._from_element(tree.getroot())
+            logger.debug(f"Parsed student from {path}: {student.name} ({student.student_id})")
+            return student
             
         except ET.ParseError as e:
             logger.error(f"XML parsing error in {path}: {e}")
@@ -106,6 +110,18 @@ class ITStudent:
             logger.error(f"Error reading student from {path}: {e}")
             raise
 
+    @classmethod
+    def from_xml_string(cls, xml: str):
+        """Create ITStudent from an XML string with error handling"""
+        try:
+            return cls._from_element(ET.fromstring(xml))
+        except ET.ParseError as e:
+            logger.error(f"XML parsing error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error reading student from XML string: {e}")
+            raise
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert student to dictionary"""
         return {
@@ -0,0 +1,213 @@
+import math
+import threading
+import logging
+from typing import List, Dict, Any, Sequence
+from ITStudent import ITStudent
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class P2Quantile:
+    """Streaming estimate of a single quantile (Jain & Chlamtac P-square).
+
+    Keeps five markers regardless of how many values are observed, so each
+    update is O(1) in time and memory.
+    """
+
+    def __init__(self, q: float):
+        if not (0.0 < q < 1.0):
+            raise ValueError("Quantile must be between 0 and 1")
+        self.q = q
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value: float):
+        """Observe a value"""
+        self.count += 1
+        heights = self.heights
+
+        # Collect the first five values exactly
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Find the cell containing the value, extending the extremes if needed
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - positions[i]
+            if ((d >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (d <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not (heights[i - 1] < height < heights[i + 1]):
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+
+    def value(self) -> float:
+        """Return the current quantile estimate"""
+        if not self.heights:
+            return 0.0
+        if self.count <= 5:
+            # Exact nearest-rank quantile over the few values seen so far
+            index = min(len(self.heights) - 1, int(math.ceil(self.q * len(self.heights))) - 1)
+            return self.heights[max(0, index)]
+        return self.heights[2]
+
+
+class RunningStats:
+    """Running count, mean, variance, min/max, pass rate and quantiles"""
+
+    def __init__(self, quantiles: Sequence[float] = None):
+        quantiles = quantiles or PROJECT_CONFIG['analytics']['quantiles']
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.passes = 0
+        self.quantiles = [P2Quantile(q) for q in quantiles]
+
+    def add(self, value: float, passed: bool):
+        """Observe a value (Welford's online mean/variance update)"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if passed:
+            self.passes += 1
+
+        for estimator in self.quantiles:
+            estimator.add(value)
+
+    def variance(self) -> float:
+        """Sample variance of the observed values"""
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert statistics to dictionary"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance(),
+            'stddev': math.sqrt(self.variance()),
+            'min': self.min,
+            'max': self.max,
+            'pass_rate': self.passes / self.count,
+            'quantiles': {estimator.q: estimator.value() for estimator in self.quantiles}
+        }
+
+
+class StreamingAnalytics:
+    """Online per-course and per-programme statistics over consumed students.
+
+    Course statistics are computed over individual marks, programme
+    statistics over student averages. Updates and snapshots are guarded by
+    a lock so several consumers can feed the same instance.
+    """
+
+    def __init__(self, pass_threshold: float = None, quantiles: Sequence[float] = None):
+        if pass_threshold is None:
+            pass_threshold = PROJECT_CONFIG['student']['pass_threshold']
+        self.pass_threshold = pass_threshold
+        self.quantiles = quantiles or PROJECT_CONFIG['analytics']['quantiles']
+        self.courses: Dict[str, RunningStats] = {}
+        self.programmes: Dict[str, RunningStats] = {}
+        self.students_seen = 0
+        self.lock = threading.Lock()
+
+    def update(self, student: ITStudent):
+        """Fold one student into the running statistics"""
+        average = student.average()
+        passed = student.passed(self.pass_threshold)
+
+        with self.lock:
+            self.students_seen += 1
+
+            stats = self.programmes.get(student.programme)
+            if stats is None:
+                stats = self.programmes[student.programme] = RunningStats(self.quantiles)
+            stats.add(average, passed)
+
+            for course, mark in zip(student.courses, student.marks):
+                stats = self.courses.get(course)
+                if stats is None:
+                    stats = self.courses[course] = RunningStats(self.quantiles)
+                stats.add(mark, mark >= self.pass_threshold)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a consistent copy of the current statistics"""
+        with self.lock:
+            return {
+                'students': self.students_seen,
+                'courses': {name: stats.to_dict() for name, stats in sorted(self.courses.items())},
+                'programmes': {name: stats.to_dict() for name, stats in sorted(self.programmes.items())}
+            }
+
+    def format_snapshot(self) -> str:
+        """Render a snapshot as a text table"""
+        snapshot = self.snapshot()
+        lines = [f"Students analysed: {snapshot['students']}"]
+        for title, group in (("Course", snapshot['courses']), ("Programme", snapshot['programmes'])):
+            lines.append("")
+            lines.append(f"{title:<18}{'n':>6}{'mean':>8}{'std':>8}{'min':>6}{'max':>6}{'pass%':>8}  quantiles")
+            for name, stats in group.items():
+                if not stats['count']:
+                    continue
+                quantiles = " ".join(f"p{q * 100:g}={v:.1f}" for q, v in stats['quantiles'].items())
+                lines.append(
+                    f"{name:<18}{stats['count']:>6}{stats['mean']:>8.2f}{stats['stddev']:>8.2f}"
+                    f"{stats['min']:>6.0f}{stats['max']:>6.0f}{stats['pass_rate'] * 100:>7.1f}%  {quantiles}"
+                )
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from student_generator import generate_many
+
+    analytics = StreamingAnalytics()
+    for student in generate_many(10000, seed=0):
+        analytics.update(student)
+    print(analytics.format_snapshot())
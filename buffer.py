@@ -19,13 +19,14 @@ class BoundedBuffer:
         
         logger.info(f"Initialized bounded buffer with capacity {capacity}")
 
-    def insert(self, item: int, timeout: Optional[float] = None) -> bool:
+    def insert(self, item: int, timeout: Optional[float] = None, warn: bool = True) -> bool:
         """Insert item into buffer with optional timeout"""
         timeout = timeout or self.operation_timeout
         
         try:
             if not self.empty.acquire(timeout=timeout):
-                logger.warning("Timeout while waiting to insert into buffer")
+                if warn:
+                    logger.warning("Timeout while waiting to insert into buffer")
                 return False
                 
             with self.mutex:
@@ -44,13 +45,14 @@ class BoundedBuffer:
                 pass
             return False
 
-    def remove(self, timeout: Optional[float] = None) -> Optional[int]:
+    def remove(self, timeout: Optional[float] = None, warn: bool = True) -> Optional[int]:
         """Remove item from buffer with optional timeout"""
         timeout = timeout or self.operation_timeout
         
         try:
             if not self.full.acquire(timeout=timeout):
-                logger.warning("Timeout while waiting to remove from buffer")
+                if warn:
+                    logger.warning("Timeout while waiting to remove from buffer")
                 return None
                 
             with self.mutex:
@@ -2,19 +2,25 @@ import threading
 import time
 import os
 import logging
+from typing import Dict, Any, Optional
 from ITStudent import ITStudent
 from buffer import BoundedBuffer
+from results_store import ResultsStore
+from analytics import StreamingAnalytics
 from config.settings import PROJECT_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class Consumer(threading.Thread):
     def __init__(self, buffer: BoundedBuffer, xml_dir: str, 
-                 consume_delay: float = None):
+                 consume_delay: float = None, results_store: ResultsStore = None,
+                 analytics: StreamingAnalytics = None):
         super().__init__(name="ConsumerThread")
         self.buffer = buffer
         self.xml_dir = xml_dir
         self.consume_delay = consume_delay or PROJECT_CONFIG['threaded']['consume_delay']
+        self.results_store = results_store
+        self.analytics = analytics
         self.running = True
         self.daemon = True
         self.students_processed = 0
@@ -23,49 +29,36 @@ class Consumer(threading.Thread):
 
     def process_file(self, file_no: int) -> bool:
         """Process a student XML file and return success status"""
-        filename = f"student{file_no:03d}.xml"
-        filepath = os.path.join(self.xml_dir, filename)
-        
-        if not os.path.exists(filepath):
-            logger.warning(f"File {filename} does not exist")
+        record = check_record(file_no, self.xml_dir)
+        if record is None:
             return False
 
         try:
             # Parse student from XML
-            student = ITStudent.from_xml_file(filepath)
+            student = parse_record(record)['student']
             
             # Display student information
             self._display_student_info(student, file_no)
             
+            # Record result before the source file disappears
+            if self.results_store is not None:
+                self.results_store.add(student, source=record['filename'])
+            if self.analytics is not None:
+                self.analytics.update(student)
+            
             # Delete the file after processing
-            try:
-                os.remove(filepath)
-                logger.debug(f"Deleted processed file: {filename}")
-            except Exception as e:
-                logger.warning(f"Could not delete {filename}: {e}")
+            delete_record(record)
             
             self.students_processed += 1
             return True
             
         except Exception as e:
-            logger.error(f"Failed to process {filename}: {e}")
+            logger.error(f"Failed to process {record['filename']}: {e}")
             return False
 
     def _display_student_info(self, student: ITStudent, file_no: int):
         """Display formatted student information"""
-        print(f"\n{'='*50}")
-        print(f"PROCESSED: student{file_no:03d}.xml")
-        print(f"{'='*50}")
-        print(f"Name: {student.name}")
-        print(f"Student ID: {student.student_id}")
-        print(f"Programme: {student.programme}")
-        print("\nCourses and Marks:")
-        for course, mark in zip(student.courses, student.marks):
-            status = "PASS" if mark >= 50 else "FAIL"
-            print(f"  {course}: {mark:3d} [{status}]")
-        print(f"\nAverage: {student.average():.2f}")
-        print(f"Overall Result: {'PASS' if student.passed() else 'FAIL'}")
-        print(f"{'='*50}\n")
+        print(format_student_info(student, file_no))
 
     def run(self):
         """Main consumer loop"""
@@ -90,6 +83,8 @@ class Consumer(threading.Thread):
                 logger.error(f"Error in consumer loop: {e}")
                 time.sleep(1)  # Brief pause on error
 
+        if self.results_store is not None:
+            self.results_store.flush()
         logger.info(f"Consumer finished. Total students processed: {self.students_processed}")
 
     def stop(self):
@@ -97,6 +92,67 @@ class Consumer(threading.Thread):
         logger.info("Stopping consumer...")
         self.running = False
 
+def format_student_info(student: ITStudent, file_no: int) -> str:
+    """Format a processed student as one printable block"""
+    lines = [
+        f"\n{'='*50}",
+        f"PROCESSED: student{file_no:03d}.xml",
+        f"{'='*50}",
+        f"Name: {student.name}",
+        f"Student ID: {student.student_id}",
+        f"Programme: {student.programme}",
+        "\nCourses and Marks:",
+    ]
+    for course, mark in zip(student.courses, student.marks):
+        status = "PASS" if mark >= 50 else "FAIL"
+        lines.append(f"  {course}: {mark:3d} [{status}]")
+    lines.append(f"\nAverage: {student.average():.2f}")
+    lines.append(f"Overall Result: {'PASS' if student.passed() else 'FAIL'}")
+    lines.append(f"{'='*50}\n")
+    return "\n".join(lines)
+
+# Pipeline steps for the consumer side. Records are plain dicts so they can
+# cross into process-based stages.
+
+def check_record(file_no: int, xml_dir: str) -> Optional[Dict[str, Any]]:
+    """Start a record for a numbered file, or drop it if the file is missing"""
+    filename = f"student{file_no:03d}.xml"
+    filepath = os.path.join(xml_dir, filename)
+    
+    if not os.path.exists(filepath):
+        logger.warning(f"File {filename} does not exist")
+        return None
+    return {'file_no': file_no, 'filename': filename, 'path': filepath}
+
+def parse_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the record's XML file into a student"""
+    record['student'] = ITStudent.from_xml_file(record['path'])
+    return record
+
+def display_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Print the record's student in one block so parallel workers don't interleave"""
+    print(format_student_info(record['student'], record['file_no']))
+    return record
+
+def make_record_step(results_store: ResultsStore = None, analytics: StreamingAnalytics = None):
+    """Return a step feeding each student to the results store and analytics"""
+    def record_result(record: Dict[str, Any]) -> Dict[str, Any]:
+        if results_store is not None:
+            results_store.add(record['student'], source=record['filename'])
+        if analytics is not None:
+            analytics.update(record['student'])
+        return record
+    return record_result
+
+def delete_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Delete the processed XML file"""
+    try:
+        os.remove(record['path'])
+        logger.debug(f"Deleted processed file: {record['filename']}")
+    except Exception as e:
+        logger.warning(f"Could not delete {record['filename']}: {e}")
+    return record
+
 if __name__ == "__main__":
     # Test the consumer
     import logging
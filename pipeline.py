@@ -0,0 +1,292 @@
+import pickle
+import threading
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from buffer import BoundedBuffer
+from profiling import Profiler
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream; forwarded stage to stage once every worker
+# of a stage has seen it
+_STOP = object()
+
+# Workers poll their buffers this often (seconds); a stage waiting for input
+# or for room downstream is normal, so these timeouts are not logged
+_POLL_INTERVAL = 0.5
+
+
+class StageStats:
+    """Per-stage counters and time accounting"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def to_dict(self, workers: int, elapsed: float) -> Dict[str, Any]:
+        """Convert stats to dictionary; utilization is busy time per worker"""
+        with self.lock:
+            capacity = workers * elapsed
+            return {
+                'items_in': self.items_in,
+                'items_out': self.items_out,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'busy_seconds': self.busy_seconds,
+                'starved_seconds': self.starved_seconds,
+                'blocked_seconds': self.blocked_seconds,
+                'utilization': self.busy_seconds / capacity if capacity > 0 else 0.0
+            }
+
+
+class Stage:
+    """One pipeline step: `func(item)` run by `workers` threads or processes.
+
+    `func` returns the item for the next stage, or None to drop it. Process
+    stages need a picklable (module-level or functools.partial) `func` and
+    picklable items. `delay` adds simulated work after each item.
+    `category` labels the stage's work in profiling breakdowns.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 kind: str = "thread", capacity: int = None, delay: float = 0.0,
+                 category: str = None):
+        if workers <= 0:
+            raise ValueError("Stage needs at least one worker")
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown worker kind '{kind}'")
+        if kind == "process":
+            # Fail now rather than on every item once the pool is running
+            try:
+                pickle.dumps(func)
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                raise ValueError(f"Stage '{name}' runs in a process pool but its "
+                                 f"function cannot be pickled: {e}")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.kind = kind
+        self.capacity = capacity or PROJECT_CONFIG['buffer_capacity']
+        self.delay = delay
+        self.category = category or name
+        self.stats = StageStats()
+
+        self.input: Optional[BoundedBuffer] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.threads: List[threading.Thread] = []
+        self.finished_workers = 0
+
+    def __repr__(self) -> str:
+        return f"Stage(name='{self.name}', workers={self.workers}, kind='{self.kind}')"
+
+
+class Pipeline:
+    """Chain of stages connected by their own bounded buffers.
+
+    A source thread feeds items from `source` into the first stage; each
+    stage's workers take from its input buffer and put results into the
+    next stage's buffer, so every stage can be scaled on its own.
+    """
+
+    def __init__(self, source: Iterable[Any], stages: List[Stage], name: str = "Pipeline",
+                 profiler: Profiler = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.source = source
+        self.stages = stages
+        self.name = name
+        self.profiler = profiler or Profiler(enabled=False)
+        self.stopping = threading.Event()
+        self.aborted = threading.Event()
+        self.source_thread: Optional[threading.Thread] = None
+        self.items_sourced = 0
+        self.started_at = None
+        self.finished_at = None
+
+        for stage in stages:
+            stage.input = BoundedBuffer(stage.capacity)
+
+    def start(self):
+        """Start the source thread and every stage's workers"""
+        self.started_at = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            if stage.kind == "process":
+                stage.executor = ProcessPoolExecutor(max_workers=stage.workers)
+            output = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                thread = self._spawn(self._worker, (stage, output), f"{stage.name}-{n + 1}")
+                stage.threads.append(thread)
+
+        self.source_thread = self._spawn(self._feed, (), f"{self.name}-source")
+        logger.info(f"{self.name} started: " +
+                    ", ".join(f"{s.name}x{s.workers}({s.kind})" for s in self.stages))
+
+    def _spawn(self, target, args, name) -> threading.Thread:
+        thread = threading.Thread(target=self.profiler.wrap(target), args=args,
+                                  name=name, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop taking from the source; items already inside still drain"""
+        logger.info(f"Stopping {self.name}...")
+        self.stopping.set()
+
+    def abort(self):
+        """Stop and discard items still in flight"""
+        self.stopping.set()
+        self.aborted.set()
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait for the pipeline to drain; return True if it finished.
+
+        If an aborted pipeline does not finish in time, its process pools
+        are shut down without waiting for the items they are running.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        threads = [self.source_thread] + [t for stage in self.stages for t in stage.threads]
+        for thread in threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+            if thread.is_alive():
+                if self.aborted.is_set():
+                    self._shutdown_executors(wait=False)
+                return False
+
+        self._shutdown_executors(wait=True)
+        self.finished_at = time.perf_counter()
+        return True
+
+    def _shutdown_executors(self, wait: bool):
+        for stage in self.stages:
+            if stage.executor is not None:
+                stage.executor.shutdown(wait=wait)
+
+    def _put(self, stage: Stage, item: Any) -> Tuple[bool, float]:
+        """Insert into a stage's buffer, retrying until accepted or aborted.
+
+        Return whether the item was accepted and how long it waited.
+        """
+        start = time.perf_counter()
+        accepted = False
+        with self.profiler.section("buffer_wait"):
+            while not accepted:
+                accepted = stage.input.insert(item, timeout=_POLL_INTERVAL, warn=False)
+                if not accepted and self.aborted.is_set() and item is not _STOP:
+                    break
+        return accepted, time.perf_counter() - start
+
+    def _feed(self):
+        try:
+            for item in self.source:
+                if self.stopping.is_set():
+                    break
+                accepted, _ = self._put(self.stages[0], item)
+                if accepted:
+                    self.items_sourced += 1
+        except Exception as e:
+            logger.error(f"{self.name} source failed: {e}")
+        finally:
+            self._put(self.stages[0], _STOP)
+
+    def _worker(self, stage: Stage, output: Optional[Stage]):
+        stats = stage.stats
+        profiler = self.profiler
+        while True:
+            start = time.perf_counter()
+            with profiler.section("buffer_wait"):
+                item = stage.input.remove(timeout=_POLL_INTERVAL, warn=False)
+            waited = time.perf_counter() - start
+            with stats.lock:
+                stats.starved_seconds += waited
+            if item is None:
+                continue
+
+            if item is _STOP:
+                # Let sibling workers see the sentinel; the last one out
+                # passes it downstream
+                stage.input.insert(_STOP)
+                with stats.lock:
+                    stage.finished_workers += 1
+                    last = stage.finished_workers == stage.workers
+                if last and output is not None:
+                    self._put(output, _STOP)
+                return
+
+            with stats.lock:
+                stats.items_in += 1
+            if self.aborted.is_set():
+                with stats.lock:
+                    stats.dropped += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                with profiler.section(stage.category):
+                    if stage.executor is not None:
+                        result = stage.executor.submit(stage.func, item).result()
+                    else:
+                        result = stage.func(item)
+                if stage.delay:
+                    with profiler.section("delay"):
+                        time.sleep(stage.delay)
+            except Exception as e:
+                result = None
+                # Pools shut down by an aborted join() fail their pending
+                # items; those count as dropped, not as errors
+                if not self.aborted.is_set():
+                    logger.error(f"Stage {stage.name} failed on item: {e}")
+                    with stats.lock:
+                        stats.errors += 1
+            busy = time.perf_counter() - start
+
+            blocked = 0.0
+            if result is not None and output is not None:
+                accepted, blocked = self._put(output, result)
+                if not accepted:
+                    result = None
+            with stats.lock:
+                stats.busy_seconds += busy
+                stats.blocked_seconds += blocked
+                if result is None:
+                    stats.dropped += 1
+                else:
+                    stats.items_out += 1
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-stage stats, in pipeline order"""
+        elapsed = self.elapsed()
+        result = {}
+        for stage in self.stages:
+            stage_stats = stage.stats.to_dict(stage.workers, elapsed)
+            stage_stats.update(workers=stage.workers, kind=stage.kind,
+                               queued=stage.input.get_size())
+            result[stage.name] = stage_stats
+        return result
+
+    def format_stats(self) -> str:
+        """Render per-stage stats as a text table"""
+        lines = [f"{'stage':<12}{'workers':>8}{'in':>7}{'out':>7}{'drop':>6}{'err':>5}"
+                 f"{'busy s':>9}{'starved s':>11}{'blocked s':>11}{'util':>7}"]
+        for name, s in self.stats().items():
+            lines.append(
+                f"{name:<12}{str(s['workers']) + s['kind'][0]:>8}{s['items_in']:>7}{s['items_out']:>7}"
+                f"{s['dropped']:>6}{s['errors']:>5}{s['busy_seconds']:>9.2f}"
+                f"{s['starved_seconds']:>11.2f}{s['blocked_seconds']:>11.2f}"
+                f"{s['utilization'] * 100:>6.0f}%"
+            )
+        return "\n".join(lines)
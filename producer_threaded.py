@@ -1,23 +1,27 @@
 import threading
 import time
-import random
 import os
 import logging
-from typing import List
+from typing import List, Dict, Any
 from ITStudent import ITStudent
 from buffer import BoundedBuffer
+from student_generator import StudentGenerator
 from config.settings import PROJECT_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class Producer(threading.Thread):
     def __init__(self, buffer: BoundedBuffer, xml_dir: str, 
-                 produce_delay: float = None, max_files: int = None):
+                 produce_delay: float = None, max_files: int = None,
+                 seed: int = None):
         super().__init__(name="ProducerThread")
         self.buffer = buffer
         self.xml_dir = xml_dir
         self.produce_delay = produce_delay or PROJECT_CONFIG['threaded']['produce_delay']
         self.max_files = max_files or PROJECT_CONFIG['max_files']
+        if seed is None:
+            seed = PROJECT_CONFIG['generator']['seed']
+        self.generator = StudentGenerator(seed)
         
         self.next_file_no = 1
         self.files_produced = 0
@@ -31,30 +35,11 @@ class Producer(threading.Thread):
 
     def generate_student(self) -> ITStudent:
         """Generate a random student record"""
-        config = PROJECT_CONFIG['student']
-        
-        name = random.choice(config['names'])
-        student_id = f"2024{random.randint(10000, 99999)}"  # More realistic ID
-        programme = random.choice(config['programmes'])
-        num_courses = random.randint(2, 4)
-        courses = random.sample(config['courses'], num_courses)
-        marks = [random.randint(40, 95) for _ in range(num_courses)]  # More realistic marks
-        
-        return ITStudent(name, student_id, programme, courses, marks)
+        return self.generator.next_student()
 
     def save_xml(self, student: ITStudent, file_no: int) -> str:
         """Save student as XML file and return file path"""
-        filename = f"student{file_no:03d}.xml"  # Zero-padded filenames
-        filepath = os.path.join(self.xml_dir, filename)
-        
-        try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(student.to_xml_string())
-            logger.debug(f"Saved student XML to {filename}")
-            return filepath
-        except Exception as e:
-            logger.error(f"Failed to save {filename}: {e}")
-            raise
+        return write_xml(self.xml_dir, file_no, student.to_xml_string())
 
     def run(self):
         """Main producer loop"""
@@ -88,6 +73,51 @@ class Producer(threading.Thread):
         logger.info("Stopping producer...")
         self.running = False
 
+def xml_filename(file_no: int) -> str:
+    return f"student{file_no:03d}.xml"  # Zero-padded filenames
+
+def write_xml(xml_dir: str, file_no: int, xml: str) -> str:
+    """Write an XML document to the numbered student file and return its path"""
+    filename = xml_filename(file_no)
+    filepath = os.path.join(xml_dir, filename)
+    
+    try:
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(xml)
+        logger.debug(f"Saved student XML to {filename}")
+        return filepath
+    except Exception as e:
+        logger.error(f"Failed to save {filename}: {e}")
+        raise
+
+# Pipeline steps for the producer side. Records are plain dicts so they can
+# cross into process-based stages.
+
+def make_generate_step(seed: int = None):
+    """Return a thread-safe step turning a file number into a student record"""
+    if seed is None:
+        seed = PROJECT_CONFIG['generator']['seed']
+    generator = StudentGenerator(seed)
+    lock = threading.Lock()
+    
+    def generate(file_no: int) -> Dict[str, Any]:
+        with lock:
+            student = generator.next_student()
+        return {'file_no': file_no, 'student': student}
+    return generate
+
+def serialize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Render the record's student as XML"""
+    record['xml'] = record['student'].to_xml_string()
+    return record
+
+def write_record(record: Dict[str, Any], xml_dir: str) -> int:
+    """Write the record's XML file and hand on just its file number"""
+    write_xml(xml_dir, record['file_no'], record['xml'])
+    logger.info(f"Produced {xml_filename(record['file_no'])} - "
+                f"{record['student'].name} ({record['student'].student_id})")
+    return record['file_no']
+
 if __name__ == "__main__":
     # Test the producer
     import logging
@@ -0,0 +1,272 @@
+"""
+Opt-in profiling for the threaded and socket demos.
+
+When enabled, every thread started through ``Profiler.wrap`` runs under its
+own cProfile, tracemalloc snapshots are sampled on a timer, and code marked
+with ``Profiler.section(category)`` adds its wall-clock time to a per-thread
+breakdown (buffer waits, XML, file I/O, output, ...). ``write_reports``
+saves all of it under the logs directory.
+
+On Python 3.12+ only one cProfile can be active and it records every
+thread, so a single process-wide profile is written instead of one per
+thread.
+
+When disabled, ``wrap`` returns its target unchanged and ``section`` returns
+a shared no-op context manager, so instrumented code only pays for one
+method call.
+"""
+
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "PRODUCER_CONSUMER_PROFILE"
+
+# From 3.12 cProfile is built on sys.monitoring: a profiler records every
+# thread and enabling a second one raises ValueError
+PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+_NULL_SECTION = nullcontext()
+
+# Allocations made by the import machinery and tracemalloc itself are noise
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+
+def profiling_requested(argv: List[str] = None) -> bool:
+    """True if --profile was passed, the environment variable is set, or the config enables it"""
+    argv = sys.argv if argv is None else argv
+    if "--profile" in argv:
+        return True
+    value = os.environ.get(ENV_VAR, "")
+    if value:
+        return value.lower() not in ("0", "false", "no", "off")
+    return PROJECT_CONFIG['profiling']['enabled']
+
+
+class _Section:
+    __slots__ = ('profiler', 'category', 'start')
+
+    def __init__(self, profiler: "Profiler", category: str):
+        self.profiler = profiler
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.category, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """cProfile, sampled tracemalloc and per-thread wall-clock breakdown for one run"""
+
+    def __init__(self, enabled: bool = None, name: str = "profile", report_dir: str = None,
+                 snapshot_interval: float = None, frames: int = None, top: int = None):
+        config = PROJECT_CONFIG['profiling']
+        self.enabled = config['enabled'] if enabled is None else enabled
+        self.name = name
+        self.report_dir = report_dir or PROJECT_CONFIG['log_directory']
+        self.snapshot_interval = snapshot_interval or config['snapshot_interval']
+        self.frames = frames or config['tracemalloc_frames']
+        self.top = top or config['top']
+
+        self.lock = threading.Lock()
+        self.breakdown: Dict[str, Dict[str, float]] = {}
+        self.thread_started: Dict[str, float] = {}
+        self.thread_wall: Dict[str, float] = {}
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.process_profile: Optional[cProfile.Profile] = None
+        self.started_tracing = False
+        self.memory_samples: List[Tuple[float, int, int]] = []
+        self.first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.started_at = None
+        self.stopped_at = None
+        self.stopping = threading.Event()
+        self.sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start tracemalloc and the snapshot sampler"""
+        if not self.enabled:
+            return
+        self.started_at = time.perf_counter()
+        # Leave tracing alone if someone else started it
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+        if not PER_THREAD_CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self.process_profile = profile
+            except ValueError as e:
+                logger.warning(f"cProfile unavailable: {e}")
+        self._sample()
+        self.sampler = threading.Thread(target=self._run_sampler, daemon=True,
+                                        name="ProfilerSampler")
+        self.sampler.start()
+        logger.info(f"Profiling enabled (memory snapshot every {self.snapshot_interval}s)")
+
+    def stop(self):
+        """Take a final memory sample and stop tracemalloc"""
+        if not self.enabled or self.started_at is None or self.stopped_at is not None:
+            return
+        self.stopping.set()
+        self.sampler.join()
+        self._sample()
+        if self.process_profile is not None:
+            self.process_profile.disable()
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.stopped_at = time.perf_counter()
+
+    def section(self, category: str):
+        """Context manager charging the enclosed wall-clock time to `category`"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, category)
+
+    def add_time(self, category: str, seconds: float):
+        name = threading.current_thread().name
+        with self.lock:
+            times = self.breakdown.setdefault(name, {})
+            times[category] = times.get(category, 0.0) + seconds
+
+    def wrap(self, target: Callable) -> Callable:
+        """Return `target` wrapped to time the calling thread (and cProfile it, before 3.12)"""
+        if not self.enabled:
+            return target
+
+        @functools.wraps(target)
+        def profiled(*args, **kwargs):
+            name = threading.current_thread().name
+            profile = None
+            if PER_THREAD_CPROFILE:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    logger.warning(f"cProfile unavailable in thread {name}: {e}")
+                    profile = None
+            with self.lock:
+                self.thread_started[name] = time.perf_counter()
+                if profile is not None:
+                    self.profiles[name] = profile
+            try:
+                return target(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                with self.lock:
+                    self.thread_wall[name] = time.perf_counter() - self.thread_started[name]
+        return profiled
+
+    def _run_sampler(self):
+        while not self.stopping.wait(self.snapshot_interval):
+            self._sample()
+
+    def _sample(self):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        with self.lock:
+            self.memory_samples.append((time.perf_counter() - self.started_at, current, peak))
+            if self.first_snapshot is None:
+                self.first_snapshot = snapshot
+            self.last_snapshot = snapshot
+
+    def write_reports(self) -> Optional[str]:
+        """Write cProfile, memory and breakdown reports; return their directory"""
+        if not self.enabled or self.started_at is None:
+            return None
+        self.stop()
+
+        directory = os.path.join(self.report_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            profiles = dict(self.profiles)
+
+        for thread_name, profile in profiles.items():
+            self._write_profile(profile, os.path.join(
+                directory, "cprofile-" + re.sub(r'[^\w.-]', '_', thread_name)),
+                f"Thread: {thread_name}")
+        if self.process_profile is not None:
+            self._write_profile(self.process_profile, os.path.join(directory, "cprofile-process"),
+                                "All threads (cProfile is process-wide on Python 3.12+)")
+
+        with open(os.path.join(directory, "memory.txt"), "w", encoding="utf-8") as f:
+            f.write(self.format_memory())
+        with open(os.path.join(directory, "breakdown.txt"), "w", encoding="utf-8") as f:
+            f.write(self.format_breakdown() + "\n")
+
+        logger.info(f"Profiling reports written to {directory}")
+        return directory
+
+    def _write_profile(self, profile: cProfile.Profile, base: str, title: str):
+        # snapshot_stats() reads the counters without disabling the
+        # profiler, so threads still running at shutdown are included
+        profile.snapshot_stats()
+        with open(base + ".prof", "wb") as f:
+            marshal.dump(profile.stats, f)
+        text = io.StringIO()
+        pstats.Stats(base + ".prof", stream=text).sort_stats("cumulative").print_stats(self.top)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"{title}\n{text.getvalue()}")
+
+    def format_breakdown(self) -> str:
+        """Render per-thread wall-clock time by category"""
+        now = self.stopped_at or time.perf_counter()
+        with self.lock:
+            threads = sorted(set(self.breakdown) | set(self.thread_started))
+            lines = [f"Wall-clock breakdown over {now - self.started_at:.2f}s"]
+            for thread_name in threads:
+                wall = self.thread_wall.get(thread_name)
+                if wall is None:
+                    # Still running at shutdown, or never wrapped
+                    started = self.thread_started.get(thread_name, self.started_at)
+                    wall = now - started
+                times = self.breakdown.get(thread_name, {})
+                lines.append(f"\n{thread_name} ({wall:.2f}s)")
+                for category, seconds in sorted(times.items(), key=lambda kv: -kv[1]):
+                    lines.append(f"  {category:<14}{seconds:>10.3f}s {seconds / wall * 100 if wall else 0:>6.1f}%")
+                other = wall - sum(times.values())
+                if other > 0:
+                    lines.append(f"  {'other':<14}{other:>10.3f}s {other / wall * 100 if wall else 0:>6.1f}%")
+        return "\n".join(lines)
+
+    def format_memory(self) -> str:
+        """Render the traced-memory timeline and the top allocation sites"""
+        with self.lock:
+            samples = list(self.memory_samples)
+            first, last = self.first_snapshot, self.last_snapshot
+
+        lines = [f"{'time s':>8} {'current KiB':>12} {'peak KiB':>10}"]
+        for at, current, peak in samples:
+            lines.append(f"{at:>8.1f} {current / 1024:>12.1f} {peak / 1024:>10.1f}")
+        if last is not None:
+            lines.append(f"\nTop {self.top} allocation sites at shutdown:")
+            lines.extend(str(stat) for stat in last.statistics('lineno')[:self.top])
+        if first is not None and last is not None and first is not last:
+            lines.append(f"\nTop {self.top} changes since the first snapshot:")
+            lines.extend(str(stat) for stat in last.compare_to(first, 'lineno')[:self.top])
+        return "\n".join(lines) + "\n"
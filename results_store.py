@@ -0,0 +1,274 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from ITStudent import ITStudent
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    programme TEXT NOT NULL,
+    average REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    source TEXT,
+    processed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS course_marks (
+    student_row INTEGER NOT NULL REFERENCES students(id),
+    student_id TEXT NOT NULL,
+    course TEXT NOT NULL,
+    mark INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_student_id ON students(student_id);
+CREATE INDEX IF NOT EXISTS idx_students_programme ON students(programme, passed);
+CREATE INDEX IF NOT EXISTS idx_course_marks_course ON course_marks(course, mark);
+CREATE INDEX IF NOT EXISTS idx_course_marks_student ON course_marks(student_row);
+"""
+
+
+class ResultsStore:
+    """SQLite-backed store for processed student results.
+
+    Records are buffered in memory and written with ``executemany`` in a
+    single transaction once ``batch_size`` records are pending, or when
+    ``flush()``/``close()`` is called. A batch that fails to write stays
+    queued for the next flush; after ``max_retries`` consecutive failures
+    the pending records are dropped and counted in ``records_dropped``.
+    """
+
+    def __init__(self, db_path: str = None, batch_size: int = None,
+                 max_retries: int = None):
+        config = PROJECT_CONFIG['results_store']
+        self.db_path = db_path or config['db_path']
+        self.batch_size = batch_size or config['batch_size']
+        if self.batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        self.max_retries = config['max_retries'] if max_retries is None else max_retries
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # One connection shared by all consumers, serialized by the lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        self.lock = threading.Lock()
+        self.pending: List[Tuple[ITStudent, Optional[str], float]] = []
+        self.records_written = 0
+        self.records_dropped = 0
+        self.failed_flushes = 0
+
+        logger.info(f"Results store opened at {self.db_path} (batch size {self.batch_size})")
+
+    def add(self, student: ITStudent, source: str = None):
+        """Queue a processed student, flushing when the batch is full"""
+        with self.lock:
+            self.pending.append((student, source, time.time()))
+            if len(self.pending) >= self.batch_size:
+                self._flush_locked()
+
+    def add_many(self, students: List[ITStudent], source: str = None):
+        """Queue several processed students at once"""
+        now = time.time()
+        with self.lock:
+            self.pending.extend((student, source, now) for student in students)
+            if len(self.pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Write all pending records in one transaction"""
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, []
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM students")
+            first_row = cursor.fetchone()[0] + 1
+
+            # Row ids are assigned sequentially inside the transaction, so
+            # course rows can reference them without a round trip per student
+            student_rows = []
+            mark_rows = []
+            for offset, (student, source, processed_at) in enumerate(batch):
+                row_id = first_row + offset
+                student_rows.append((
+                    row_id, student.student_id, student.name, student.programme,
+                    student.average(), int(student.passed()), source, processed_at
+                ))
+                mark_rows.extend(
+                    (row_id, student.student_id, course, mark)
+                    for course, mark in zip(student.courses, student.marks)
+                )
+
+            cursor.executemany(
+                "INSERT INTO students (id, student_id, name, programme, average, "
+                "passed, source, processed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                student_rows
+            )
+            cursor.executemany(
+                "INSERT INTO course_marks (student_row, student_id, course, mark) "
+                "VALUES (?, ?, ?, ?)",
+                mark_rows
+            )
+            cursor.execute("COMMIT")
+            self.records_written += len(batch)
+            self.failed_flushes = 0
+            logger.debug(f"Flushed {len(batch)} results to store")
+        except Exception as e:
+            # A failed BEGIN leaves no transaction to roll back
+            if self.conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            self.failed_flushes += 1
+            if self.failed_flushes > self.max_retries:
+                # A persistent error (disk full, locked database) must not
+                # grow the queue without bound
+                self.failed_flushes = 0
+                self.records_dropped += len(batch)
+                logger.error(f"Dropped {len(batch)} results after {self.max_retries + 1} "
+                             f"failed writes ({self.records_dropped} dropped in total): {e}")
+            else:
+                # Keep the batch queued so a later flush can retry it; the
+                # source files may already be gone
+                self.pending[:0] = batch
+                logger.error(f"Failed to write {len(batch)} results "
+                             f"(attempt {self.failed_flushes}): {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def get_student(self, student_id: str) -> List[Dict[str, Any]]:
+        """Look up all results recorded for a student ID"""
+        self.flush()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, student_id, name, programme, average, passed, source, "
+                "processed_at FROM students WHERE student_id = ? ORDER BY id",
+                (student_id,)
+            ).fetchall()
+
+            results = []
+            for row in rows:
+                marks = self.conn.execute(
+                    "SELECT course, mark FROM course_marks WHERE student_row = ?",
+                    (row[0],)
+                ).fetchall()
+                results.append({
+                    'student_id': row[1],
+                    'name': row[2],
+                    'programme': row[3],
+                    'courses': [course for course, _ in marks],
+                    'marks': [mark for _, mark in marks],
+                    'average': row[4],
+                    'passed': bool(row[5]),
+                    'source': row[6],
+                    'processed_at': row[7]
+                })
+            return results
+
+    def pass_rate_by_programme(self) -> Dict[str, Dict[str, Any]]:
+        """Return student count, passes and pass rate per programme"""
+        self.flush()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT programme, COUNT(*), SUM(passed), AVG(average) "
+                "FROM students GROUP BY programme ORDER BY programme"
+            ).fetchall()
+        return {
+            programme: {
+                'students': total,
+                'passed': passed,
+                'pass_rate': passed / total if total else 0.0,
+                'average': average
+            }
+            for programme, total, passed, average in rows
+        }
+
+    def pass_rate_for_programme(self, programme: str) -> float:
+        """Return the pass rate for a single programme"""
+        self.flush()
+        with self.lock:
+            total, passed = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(passed), 0) FROM students "
+                "WHERE programme = ?",
+                (programme,)
+            ).fetchone()
+        return passed / total if total else 0.0
+
+    def course_summary(self, course: str, threshold: float = None) -> Dict[str, Any]:
+        """Return count, average mark and pass rate for a course"""
+        if threshold is None:
+            threshold = PROJECT_CONFIG['student']['pass_threshold']
+        self.flush()
+        with self.lock:
+            total, average, passed = self.conn.execute(
+                "SELECT COUNT(*), AVG(mark), COALESCE(SUM(mark >= ?), 0) "
+                "FROM course_marks WHERE course = ?",
+                (threshold, course)
+            ).fetchone()
+        return {
+            'course': course,
+            'entries': total,
+            'average': average or 0.0,
+            'pass_rate': passed / total if total else 0.0
+        }
+
+    def count(self) -> int:
+        """Return number of stored student results"""
+        self.flush()
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def close(self):
+        """Flush pending records and close the database"""
+        with self.lock:
+            try:
+                self._flush_locked()
+            finally:
+                self.conn.close()
+        logger.info(f"Results store closed. Total results written: {self.records_written}, "
+                    f"dropped: {self.records_dropped}")
+
+
+def benchmark_inserts(num_records: int = 20000, batch_sizes=(1, 10, 100, 1000),
+                      db_path: str = None) -> Dict[int, float]:
+    """Measure insert throughput (records/second) for several batch sizes"""
+    import tempfile
+    from student_generator import generate_many
+
+    students = generate_many(num_records, seed=0)
+
+    results = {}
+    for batch_size in batch_sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = ResultsStore(db_path or os.path.join(tmp_dir, "bench.db"), batch_size)
+            start = time.perf_counter()
+            for student in students:
+                store.add(student)
+            store.flush()
+            elapsed = time.perf_counter() - start
+            store.close()
+        results[batch_size] = num_records / elapsed
+        print(f"batch_size={batch_size:5d}: {results[batch_size]:10.0f} records/s")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    print("Benchmarking results store insert throughput...")
+    benchmark_inserts()
@@ -27,17 +27,38 @@ def run_socket_demo():
         # Import here to avoid circular imports
         from src.socket_producer import run_server
         from src.socket_consumer import run_client
+        from src.socket_transport import socket_pair
+        from src.results_store import ResultsStore
+        from src.analytics import StreamingAnalytics
+        from src.profiling import Profiler, profiling_requested
+        
+        results_store = ResultsStore()
+        analytics = StreamingAnalytics()
+        profiler = Profiler(enabled=profiling_requested(), name="profile-socket")
+        
+        # Pick the transport; a socketpair needs no listener at all
+        socket_config = PROJECT_CONFIG['socket']
+        transport = socket_config['transport']
+        server_kwargs = {'delay': socket_config['delay'], 'transport': transport,
+                         'profiler': profiler}
+        client_kwargs = {'transport': transport, 'profiler': profiler}
+        if transport == "socketpair":
+            server_kwargs['sock'], client_kwargs['sock'] = socket_pair()
+        logger.info(f"Using {transport} transport")
         
         # Start producer in a separate thread
+        profiler.start()
         producer_thread = threading.Thread(
-            target=run_server,
+            target=profiler.wrap(run_server),
+            kwargs=server_kwargs,
             daemon=True,
             name="SocketProducer"
         )
         producer_thread.start()
         
-        logger.info("Socket producer started, waiting for initialization...")
-        time.sleep(2)  # Give producer time to start
+        if transport != "socketpair":
+            logger.info("Socket producer started, waiting for initialization...")
+            time.sleep(2)  # Give producer time to start
         
         # Run consumer in main thread
         print("\n" + "="*60)
@@ -47,7 +68,15 @@ def run_socket_demo():
         print("Press Ctrl+C to stop the demo")
         print("="*60 + "\n")
         
-        run_client()
+        try:
+            profiler.wrap(run_client)(results_store=results_store, analytics=analytics,
+                                      **client_kwargs)
+        finally:
+            results_store.close()
+            print("\n" + analytics.format_snapshot())
+            report_dir = profiler.write_reports()
+            if report_dir:
+                print(f"Profiling reports: {report_dir}")
         
     except KeyboardInterrupt:
         logger.info("Socket demo interrupted by user")
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 """
-Main entry point for threaded producer-consumer demo
+Main entry point for threaded producer-consumer demo.
+
+The producer and consumer steps run as a staged pipeline: each step has its
+own bounded buffer and worker count (PROJECT_CONFIG['pipeline']), so a slow
+step can be scaled without touching the others.
 """
 
 import os
 import time
 import logging
 import logging.config
-from src.buffer import BoundedBuffer
-from src.producer_threaded import Producer
-from src.consumer_threaded import Consumer
+from functools import partial
+from src.pipeline import Pipeline, Stage
+from src.producer_threaded import make_generate_step, serialize_record, write_record, xml_filename
+from src.consumer_threaded import (check_record, parse_record, display_record,
+                                   make_record_step, delete_record)
+from src.results_store import ResultsStore
+from src.analytics import StreamingAnalytics
+from src.profiling import Profiler, profiling_requested
 from config.settings import PROJECT_CONFIG, LOGGING_CONFIG
 
 def setup_environment():
@@ -21,6 +30,46 @@ def setup_environment():
     # Configure logging
     logging.config.dictConfig(LOGGING_CONFIG)
 
+def file_numbers(interval: float, limit: int):
+    """Yield sequential file numbers, one every `interval` seconds"""
+    for file_no in range(1, limit + 1):
+        yield file_no
+        time.sleep(interval)
+
+def remove_leftover_files(xml_dir: str, count: int) -> int:
+    """Delete XML files of the first `count` records that were never consumed"""
+    removed = 0
+    for file_no in range(1, count + 1):
+        path = os.path.join(xml_dir, xml_filename(file_no))
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def build_pipeline(results_store: ResultsStore, analytics: StreamingAnalytics,
+                   profiler: Profiler = None) -> Pipeline:
+    """Build the producer-consumer pipeline from PROJECT_CONFIG['pipeline']"""
+    config = PROJECT_CONFIG['pipeline']
+    xml_dir = PROJECT_CONFIG['xml_directory']
+    # (stage, step, simulated delay, profiling category)
+    steps = [
+        ("generate", make_generate_step(), 0.0, "generate"),
+        ("serialize", serialize_record, 0.0, "xml"),
+        ("write", partial(write_record, xml_dir=xml_dir), 0.0, "file_io"),
+        ("check", partial(check_record, xml_dir=xml_dir), 0.0, "file_io"),
+        ("parse", parse_record, 0.0, "xml"),
+        # The simulated slow consumer step
+        ("display", display_record, PROJECT_CONFIG['threaded']['consume_delay'], "output"),
+        ("record", make_record_step(results_store, analytics), 0.0, "store"),
+        ("delete", delete_record, 0.0, "file_io")
+    ]
+    stages = [Stage(name, func, delay=delay, category=category, **config['stages'][name])
+              for name, func, delay, category in steps]
+    source = file_numbers(PROJECT_CONFIG['threaded']['produce_delay'], config['max_records'])
+    return Pipeline(source, stages, name="StudentPipeline", profiler=profiler)
+
 def main():
     """Main threaded demo"""
     setup_environment()
@@ -29,24 +78,16 @@ def main():
     logger.info("Starting Producer-Consumer Demo (Threaded Version)")
     
     # Initialize components
-    buffer = BoundedBuffer(PROJECT_CONFIG['buffer_capacity'])
-    producer = Producer(
-        buffer, 
-        PROJECT_CONFIG['xml_directory'],
-        PROJECT_CONFIG['threaded']['produce_delay'],
-        PROJECT_CONFIG['max_files']
-    )
-    consumer = Consumer(
-        buffer,
-        PROJECT_CONFIG['xml_directory'], 
-        PROJECT_CONFIG['threaded']['consume_delay']
-    )
+    results_store = ResultsStore()
+    analytics = StreamingAnalytics()
+    profiler = Profiler(enabled=profiling_requested(), name="profile-threaded")
+    pipeline = build_pipeline(results_store, analytics, profiler)
     
-    # Start threads
-    producer.start()
-    consumer.start()
+    # Start stage workers
+    profiler.start()
+    pipeline.start()
     
-    logger.info("Producer and Consumer threads started")
+    logger.info("Pipeline stages started")
     print("\n" + "="*60)
     print("PRODUCER-CONSUMER DEMO RUNNING (Threaded Version)")
     print("Press Ctrl+C to stop the demo")
@@ -62,19 +103,42 @@ def main():
         logger.info("Demo interrupted by user")
         print("\nStopping demo...")
     finally:
-        # Stop threads
-        producer.stop()
-        consumer.stop()
-        
-        # Wait for threads to finish
-        producer.join(timeout=5)
-        consumer.join(timeout=5)
+        # Stop the source and let records already in flight drain
+        pipeline.stop()
+        drained = pipeline.join(timeout=PROJECT_CONFIG['pipeline']['join_timeout'])
+        if not drained:
+            logger.warning("Pipeline did not drain in time, discarding remaining records")
+            pipeline.abort()
+            drained = pipeline.join(timeout=5)
+            # Aborted records leave their XML files behind
+            removed = remove_leftover_files(PROJECT_CONFIG['xml_directory'],
+                                            pipeline.items_sourced)
+            if removed:
+                logger.warning(f"Removed {removed} XML file(s) of discarded records")
+        if drained:
+            results_store.close()
+        else:
+            # A stage thread may still record a result; closing the
+            # connection under it would fail, so only commit what we have
+            logger.warning("Pipeline threads still running, leaving results store open")
+            results_store.flush()
+        report_dir = profiler.write_reports()
         
         # Summary
+        stats = pipeline.stats()
         print("\n" + "="*60)
         print("DEMO SUMMARY")
-        print(f"Files produced: {producer.files_produced}")
-        print(f"Students processed: {consumer.students_processed}")
+        print(f"Files produced: {stats['write']['items_out']}")
+        print(f"Students processed: {stats['delete']['items_out']}")
+        print(f"Results stored: {results_store.records_written} ({results_store.db_path}), "
+              f"dropped: {results_store.records_dropped}")
+        print("-"*60)
+        print(pipeline.format_stats())
+        print("-"*60)
+        print(analytics.format_snapshot())
+        print("-"*60)
+        if report_dir:
+            print(f"Profiling reports: {report_dir}")
         print("Demo finished successfully!")
         print("="*60)
 
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Dict, Any
 
 
@@ -19,7 +20,75 @@ PROJECT_CONFIG: Dict[str, Any] = {
     "socket": {
         "host": "127.0.0.1",
         "port": 9009,
-        "delay": 1.0
+        "transport": "tcp",  # tcp, unix or socketpair
+        "unix_path": os.path.join(tempfile.gettempdir(), "producer_consumer.sock"),
+        "delay": 1.0,
+        "window": 32,
+        "ack_every": 8,
+        "reconnect_attempts": 3,
+        "reconnect_delay": 1.0,
+        # none or zlib (with the preset dictionary when both sides share it);
+        # worth enabling only where the link, not the CPU, is the bottleneck
+        "compression": "none",
+        "compression_level": 6,
+        "batch_size": 16,
+        "vocabulary": {
+            "names": ["Lungelo", "Michael", "Aisha", "Sipho", "Nokuthula", "Thabo"],
+            "programmes": ["BSc IT", "Computer Science", "BSC", "BEng"],
+            "courses": ["CS101", "CS102", "MATH101", "ENG101", "DS201", "NET301"]
+        }
+    },
+
+
+    "loadgen": {
+        "rate": 500,
+        "connections": 4,
+        "duration": 10,
+        "p99_limit": 0.1
+    },
+
+
+    "results_store": {
+        "db_path": os.path.join("logs", "results.db"),
+        "batch_size": 100,
+        "max_retries": 3  # failed flushes before pending results are dropped
+    },
+
+
+    "analytics": {
+        "quantiles": [0.5, 0.9, 0.99]
+    },
+
+
+    "generator": {
+        "seed": None,
+        "batch_size": 256
+    },
+
+
+    "pipeline": {
+        "max_records": 100,
+        "join_timeout": 10,
+        # Per-stage worker count and kind ("thread" or "process")
+        "stages": {
+            "generate": {"workers": 1, "kind": "thread"},
+            "serialize": {"workers": 1, "kind": "thread"},
+            "write": {"workers": 1, "kind": "thread"},
+            "check": {"workers": 1, "kind": "thread"},
+            "parse": {"workers": 1, "kind": "thread"},
+            "display": {"workers": 2, "kind": "thread"},
+            "record": {"workers": 1, "kind": "thread"},
+            "delete": {"workers": 1, "kind": "thread"}
+        }
+    },
+
+
+    "profiling": {
+        # Also switched on by --profile or PRODUCER_CONSUMER_PROFILE=1
+        "enabled": False,
+        "snapshot_interval": 5.0,  # seconds between tracemalloc snapshots
+        "tracemalloc_frames": 1,
+        "top": 25
     },
     
    
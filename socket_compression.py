@@ -0,0 +1,221 @@
+"""
+Per-batch compression for the socket protocol.
+
+Student XML repeats the same tags, programmes and course codes in every
+record, so each batch is compressed with zlib primed by a preset dictionary
+built from the ITStudent XML layout and the configured vocabularies. Both
+sides build the dictionary from the same code and configuration; its CRC is
+exchanged at connect time so a mismatch falls back to plain zlib.
+"""
+
+import struct
+import time
+import zlib
+import logging
+from typing import List, Sequence, Tuple
+
+from ITStudent import ITStudent
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZLIB_DICT = 2
+
+CODEC_NAMES = {CODEC_NONE: "none", CODEC_ZLIB: "zlib", CODEC_ZLIB_DICT: "zlib+dict"}
+
+# Each record inside a batch is prefixed with its own 4-byte length
+_RECORD_LEN = struct.Struct('>I')
+
+_preset_dictionary = None
+
+
+def build_preset_dictionary() -> bytes:
+    """Build the shared zlib dictionary from the XML layout and vocabularies"""
+    student = PROJECT_CONFIG['student']
+    socket_vocabulary = PROJECT_CONFIG['socket']['vocabulary']
+
+    fragments = []
+    for tag, key in (("Name", "names"), ("Programme", "programmes"), ("CourseName", "courses")):
+        for vocabulary in (student[key], socket_vocabulary[key]):
+            for word in vocabulary:
+                fragment = f"<{tag}>{word}</{tag}>"
+                if fragment not in fragments:
+                    fragments.append(fragment)
+
+    # zlib favours matches near the end of the dictionary, so the XML
+    # skeleton that every record repeats goes last
+    template = ITStudent(
+        student['names'][0], "202400000", student['programmes'][0],
+        list(student['courses'][:4]), [50, 60, 70, 80]
+    ).to_xml_string()
+    return ("".join(fragments) + template).encode('utf-8')
+
+
+def preset_dictionary() -> bytes:
+    global _preset_dictionary
+    if _preset_dictionary is None:
+        _preset_dictionary = build_preset_dictionary()
+    return _preset_dictionary
+
+
+def dictionary_id() -> int:
+    """CRC32 identifying the preset dictionary"""
+    return zlib.crc32(preset_dictionary())
+
+
+def supported_codecs() -> int:
+    """Bitmask of codecs this side can decode"""
+    return (1 << CODEC_NONE) | (1 << CODEC_ZLIB) | (1 << CODEC_ZLIB_DICT)
+
+
+def negotiate(offered: int, peer_dictionary_id: int, preference: str = None) -> int:
+    """Pick the codec to use given the consumer's offer and our preference"""
+    preference = preference or PROJECT_CONFIG['socket']['compression']
+    if preference == "none":
+        return CODEC_NONE
+    if preference != "zlib":
+        raise ValueError(f"Unknown compression '{preference}'")
+    if offered & (1 << CODEC_ZLIB_DICT) and peer_dictionary_id == dictionary_id():
+        return CODEC_ZLIB_DICT
+    if offered & (1 << CODEC_ZLIB):
+        return CODEC_ZLIB
+    return CODEC_NONE
+
+
+class CompressionStats:
+    """Bytes in and out of the codec and the CPU time spent compressing.
+
+    `seconds` is thread CPU time, so time spent waiting for the GIL while
+    other threads run is not counted.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.records = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.seconds = 0.0
+
+    def add(self, records: int, raw_bytes: int, wire_bytes: int, seconds: float):
+        self.batches += 1
+        self.records += records
+        self.raw_bytes += raw_bytes
+        self.wire_bytes += wire_bytes
+        self.seconds += seconds
+
+    def merge(self, other: "CompressionStats"):
+        self.batches += other.batches
+        self.records += other.records
+        self.raw_bytes += other.raw_bytes
+        self.wire_bytes += other.wire_bytes
+        self.seconds += other.seconds
+
+    def ratio(self) -> float:
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def format(self) -> str:
+        if not self.batches:
+            return "no batches sent"
+        per_record = self.seconds / self.records * 1e6
+        saved = self.raw_bytes - self.wire_bytes
+        line = (f"{self.records} records in {self.batches} batches, "
+                f"{self.raw_bytes} -> {self.wire_bytes} bytes (ratio {self.ratio():.2f}), "
+                f"{per_record:.1f} us CPU/record")
+        if saved > 0 and self.seconds > 0:
+            # Compression pays off on links slower than the rate at which
+            # it removes bytes
+            line += f", saves {saved / self.seconds / 1e6:.1f} MB per CPU-second"
+        return line
+
+
+class BatchCodec:
+    """Packs several records into one (optionally compressed) batch body"""
+
+    def __init__(self, codec: int = CODEC_NONE, level: int = None,
+                 stats: CompressionStats = None):
+        if codec not in CODEC_NAMES:
+            raise ValueError(f"Unknown codec {codec}")
+        self.codec = codec
+        self.level = PROJECT_CONFIG['socket']['compression_level'] if level is None else level
+        self.stats = stats if stats is not None else CompressionStats()
+
+    @property
+    def name(self) -> str:
+        return CODEC_NAMES[self.codec]
+
+    def encode(self, bodies: Sequence[bytes]) -> bytes:
+        """Concatenate length-prefixed records and compress them"""
+        start = time.thread_time()
+        raw = b"".join(_RECORD_LEN.pack(len(body)) + body for body in bodies)
+        if self.codec == CODEC_NONE:
+            data = raw
+        else:
+            if self.codec == CODEC_ZLIB_DICT:
+                compressor = zlib.compressobj(self.level, zdict=preset_dictionary())
+            else:
+                compressor = zlib.compressobj(self.level)
+            data = compressor.compress(raw) + compressor.flush()
+        self.stats.add(len(bodies), len(raw), len(data), time.thread_time() - start)
+        return data
+
+
+def decode_batch(codec: int, data: bytes, count: int) -> List[bytes]:
+    """Decompress a batch body and split it back into records"""
+    if codec == CODEC_ZLIB_DICT:
+        decompressor = zlib.decompressobj(zdict=preset_dictionary())
+        raw = decompressor.decompress(data) + decompressor.flush()
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    elif codec == CODEC_NONE:
+        raw = data
+    else:
+        raise ValueError(f"Unknown codec {codec}")
+
+    records = []
+    offset = 0
+    view = memoryview(raw)
+    for _ in range(count):
+        (length,) = _RECORD_LEN.unpack_from(raw, offset)
+        offset += _RECORD_LEN.size
+        records.append(bytes(view[offset:offset + length]))
+        offset += length
+    if offset != len(raw):
+        raise ValueError("Batch length does not match its records")
+    return records
+
+
+def benchmark_compression(batch_sizes=(1, 4, 16, 64), records: int = 4096,
+                          seed: int = 0) -> List[Tuple[int, str, float, float, float]]:
+    """Report ratio and CPU cost per record for each codec and batch size.
+
+    Encode and decode are both timed with thread CPU time so they compare.
+    """
+    from socket_producer import make_generator
+
+    bodies = [student.to_xml_string().encode('utf-8')
+              for student in make_generator(seed).generate_many(records)]
+    results = []
+    print(f"{'batch':>6} {'codec':<10} {'ratio':>7} {'enc us/rec':>11} {'dec us/rec':>11}")
+    for batch_size in batch_sizes:
+        for codec in (CODEC_NONE, CODEC_ZLIB, CODEC_ZLIB_DICT):
+            encoder = BatchCodec(codec)
+            decode_seconds = 0.0
+            for i in range(0, records, batch_size):
+                chunk = bodies[i:i + batch_size]
+                data = encoder.encode(chunk)
+                start = time.thread_time()
+                decode_batch(codec, data, len(chunk))
+                decode_seconds += time.thread_time() - start
+            stats = encoder.stats
+            row = (batch_size, encoder.name, stats.ratio(),
+                   stats.seconds / records * 1e6, decode_seconds / records * 1e6)
+            results.append(row)
+            print(f"{row[0]:>6} {row[1]:<10} {row[2]:>7.2f} {row[3]:>11.1f} {row[4]:>11.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    print(f"Preset dictionary: {len(preset_dictionary())} bytes (id {dictionary_id():08x})")
+    benchmark_compression()
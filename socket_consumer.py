@@ -1,6 +1,10 @@
 import socket
 import sys
 import os
+import select
+import sqlite3
+import threading
+import time
 
 # --- FIX START: Dynamic Import Path ---
 # Get the absolute path to the folder containing this file (the 'src' folder)
@@ -10,66 +14,195 @@ sys.path.append(current_dir)
 
 # Now we can import ITStudent directly without the 'src.' prefix
 from ITStudent import ITStudent
+from results_store import ResultsStore
+from analytics import StreamingAnalytics
+from socket_protocol import (recv_frame, send_frame, encode_hello, encode_ack,
+                             decode_records, ReceiverState)
+from socket_transport import (create_listener, accept, close_listener, connect, describe,
+                              standalone_transport)
+from profiling import Profiler
+from config.settings import PROJECT_CONFIG
 # --- FIX END ---
 
-def recv_all(sock, n):
-    """Helper to ensure we receive exactly n bytes from the TCP stream."""
-    data = b''
-    while len(data) < n:
-        packet = sock.recv(n - len(data))
-        if not packet:
-            return None
-        data += packet
-    return data
+def format_student(student: ITStudent) -> str:
+    """Format a received student as a single printable block"""
+    lines = [
+        "--- Socket Consumer Received ---",
+        f"Name: {student.name}",
+        f"Student ID: {student.student_id}",
+        f"Programme: {student.programme}",
+    ]
+    for c, m in zip(student.courses, student.marks):
+        lines.append(f"  {c}: {m}")
+    lines.append(f"Average: {student.average():.2f}")
+    lines.append(f"Result: {'PASS' if student.passed() else 'FAIL'}")
+    lines.append("-" * 30)
+    return "\n".join(lines)
 
-def run_client(host='127.0.0.1', port=9009):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        try:
-            s.connect((host, port))
-            print(f"[Socket Consumer] Connected to {host}:{port}")
-        except ConnectionRefusedError:
-            print(f"[Socket Consumer] Could not connect to {host}:{port}. Is the server running?")
-            return
+def consume_stream(sock, source: str, results_store: ResultsStore = None,
+                   analytics: StreamingAnalytics = None,
+                   state: ReceiverState = None, profiler: Profiler = None) -> int:
+    """Process student XML records until the peer closes.
 
-        try:
-            while True:
-                # 1. Read length prefix (first 4 bytes)
-                raw_len = recv_all(s, 4)
-                if not raw_len:
-                    break
-                length = int.from_bytes(raw_len, byteorder='big')
-                
-                # 2. Read the actual XML data based on the length
-                data = recv_all(s, length)
-                if not data:
-                    break
-                
-                xml = data.decode('utf-8')
+    Grants the producer `state.window` credits up front and acknowledges
+    processed records cumulatively, returning credits as it goes. Records
+    are committed to `results_store` before they are acknowledged, so the
+    producer never releases a record that could still be lost here. A
+    results store failure is raised rather than treated as a closed stream.
+    """
+    state = state or ReceiverState()
+    profiler = profiler or Profiler(enabled=False)
+    received = 0
+    unacked = 0
+    try:
+        # 1. Tell the producer where to resume and how much it may send
+        send_frame(sock, encode_hello(state.last_seq, state.window))
+        
+        while True:
+            # 2. Read one frame: a single record or a (compressed) batch
+            with profiler.section("socket_io"):
+                payload = recv_frame(sock)
+            if payload is None:
+                break
+            with profiler.section("decompress"):
+                records = decode_records(payload)
+            
+            for seq, body in records:
+                if seq <= state.last_seq:
+                    # Resent after a reconnect but already processed
+                    state.duplicates += 1
+                    continue
                 
-                # 3. Write XML to a temporary file so we can use the parsing method
-                # Note: We save this in the current directory
-                temp_filename = os.path.join(current_dir, "socket_received.xml")
+                # 3. Parse the XML straight from memory
+                with profiler.section("xml"):
+                    student = ITStudent.from_xml_string(body.decode('utf-8'))
+                received += 1
                 
-                with open(temp_filename, "w", encoding="utf-8") as f:
-                    f.write(xml)
+                # Print the whole block at once so concurrent streams don't interleave
+                with profiler.section("output"):
+                    print(format_student(student))
                 
-                # 4. Parse the file back into an object
-                student = ITStudent.from_xml_file(temp_filename)
-                
-                print("--- Socket Consumer Received ---")
-                print(f"Name: {student.name}")
-                print(f"Student ID: {student.student_id}")
-                print(f"Programme: {student.programme}")
-                for c, m in zip(student.courses, student.marks):
-                    print(f"  {c}: {m}")
-                print(f"Average: {student.average():.2f}")
-                print(f"Result: {'PASS' if student.passed() else 'FAIL'}")
-                print("-" * 30)
-                
-        except KeyboardInterrupt:
-            print("[Socket Consumer] Interrupted by user.")
-        except Exception as e:
-            print(f"[Socket Consumer] Error: {e}")
+                with profiler.section("store"):
+                    if results_store is not None:
+                        results_store.add(student, source=source)
+                    if analytics is not None:
+                        analytics.update(student)
+                state.last_seq = seq
+            
+            # 4. Acknowledge in batches, or straight away when the stream goes quiet
+            unacked += len(records)
+            if unacked >= state.ack_every or not _has_pending(sock):
+                if results_store is not None:
+                    with profiler.section("store"):
+                        results_store.flush()
+                with profiler.section("socket_io"):
+                    send_frame(sock, encode_ack(state.last_seq, unacked))
+                unacked = 0
+            
+    except KeyboardInterrupt:
+        print("[Socket Consumer] Interrupted by user.")
+        # Propagate so run_client stops instead of reconnecting
+        raise
+    except sqlite3.Error as e:
+        # Records past the last ack were not committed; stop rather than
+        # reconnect, so the producer keeps them for resend
+        print(f"[Socket Consumer] Results store failed: {e}")
+        raise
+    except Exception as e:
+        print(f"[Socket Consumer] Error: {e}")
+    finally:
+        if results_store is not None:
+            results_store.flush()
+    return received
+
+def _has_pending(sock) -> bool:
+    """Return True if more data can be read without blocking"""
+    readable, _, _ = select.select([sock], [], [], 0)
+    return bool(readable)
+
+def run_client(host='127.0.0.1', port=9009, results_store: ResultsStore = None,
+               analytics: StreamingAnalytics = None, reconnect_attempts: int = None,
+               state: ReceiverState = None, transport=None, path=None, sock=None,
+               profiler: Profiler = None):
+    """Connect to a producer and consume its records.
+
+    `transport` selects tcp or unix (see socket_transport); pass an already
+    connected `sock` (e.g. one end of a socketpair) to consume from it directly.
+    """
+    config = PROJECT_CONFIG['socket']
+    profiler = profiler or Profiler(enabled=False)
+    if sock is not None:
+        with sock:
+            consume_stream(sock, "socketpair", results_store, analytics, state, profiler)
+        return
+    
+    if reconnect_attempts is None:
+        reconnect_attempts = config['reconnect_attempts']
+    # Protocol state survives reconnects so the producer resumes where we stopped
+    state = state or ReceiverState()
+    endpoint = describe(transport, host, port, path)
+    attempt = 0
+    
+    while True:
+        try:
+            with profiler.section("accept"):
+                s = connect(transport, host, port, path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            print(f"[Socket Consumer] Could not connect to {endpoint}. Is the server running?")
+        else:
+            print(f"[Socket Consumer] Connected to {endpoint}")
+            with s:
+                if consume_stream(s, f"socket:{endpoint}", results_store, analytics, state,
+                                  profiler):
+                    attempt = 0
+        
+        attempt += 1
+        if attempt > reconnect_attempts:
+            return
+        print(f"[Socket Consumer] Reconnecting after record {state.last_seq} "
+              f"(attempt {attempt}/{reconnect_attempts})")
+        time.sleep(config['reconnect_delay'])
+
+def run_consumer_server(host='127.0.0.1', port=9009, results_store: ResultsStore = None,
+                        analytics: StreamingAnalytics = None, transport=None, path=None):
+    """Accept producer connections and consume each one on its own thread"""
+    listener = create_listener(transport, host, port, path, backlog=socket.SOMAXCONN)
+    print(f"[Socket Consumer] Listening on {describe(transport, host, port, path)}")
+    
+    try:
+        while True:
+            conn, label = accept(listener)
+            print(f"[Socket Consumer] Connection from {label}")
+            threading.Thread(
+                target=_serve_connection,
+                args=(conn, f"socket:{label}", results_store, analytics),
+                daemon=True,
+                name=f"SocketConsumer-{label}"
+            ).start()
+    except KeyboardInterrupt:
+        print("[Socket Consumer] Interrupted by user.")
+    finally:
+        close_listener(listener)
+
+def _serve_connection(conn, source, results_store, analytics):
+    with conn:
+        try:
+            received = consume_stream(conn, source, results_store, analytics)
+        except sqlite3.Error:
+            # Unacknowledged records stay with the producer for resend
+            print(f"[Socket Consumer] {source} closed after a results store failure")
+            return
+    print(f"[Socket Consumer] {source} closed after {received} records")
 
 if __name__ == "__main__":
-    run_client()
\ No newline at end of file
+    try:
+        standalone_transport()
+    except ValueError as e:
+        sys.exit(f"[Socket Consumer] {e}")
+    if "--serve" in sys.argv:
+        run_consumer_server()
+    else:
+        try:
+            run_client()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for the socket consumer.
+
+Drives a target message rate across N connections using the socket protocol,
+either as the server that ``run_client`` instances connect to, or as a client
+of ``run_consumer_server``. Every message has an intended send time fixed by
+the schedule; latency is measured from that intended time to the consumer's
+acknowledgement, not from when the sender actually got round to it, so a
+stalled consumer shows up as growing latency instead of silently lowering
+the offered rate (coordinated omission).
+"""
+
+import argparse
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Sequence
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from socket_protocol import FlowControlledSender, ProtocolError
+from socket_compression import CompressionStats
+from socket_producer import make_generator
+from socket_transport import (create_listener, accept, close_listener, connect, describe,
+                              standalone_transport)
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with about 1% relative precision"""
+
+    def __init__(self, precision: float = 0.01):
+        self.base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Record one latency sample"""
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log(micros) / self.base)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        """Fold another histogram's samples into this one"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Return the latency (seconds) at percentile p (0-100)"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                # Upper edge of the bucket, capped by the observed maximum
+                return min(math.exp((index + 1) * self.base) / 1e6, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def format(self, percentiles: Sequence[float] = (50, 90, 99, 99.9)) -> str:
+        """Render the distribution as a short text report"""
+        lines = [f"{'percentile':>12}  latency (ms)"]
+        for p in percentiles:
+            lines.append(f"{p:>11g}%  {self.percentile(p) * 1000:10.3f}")
+        lines.append(f"{'max':>12}  {self.max * 1000:10.3f}")
+        lines.append(f"{'mean':>12}  {self.mean() * 1000:10.3f}")
+        return "\n".join(lines)
+
+
+def build_payloads(count: int, seed: int = None) -> List[bytes]:
+    """Pre-serialize a pool of student XML messages"""
+    generator = make_generator(seed)
+    return [student.to_xml_string().encode('utf-8')
+            for student in generator.generate_many(count)]
+
+
+def _drive_connection(sock: socket.socket, payloads: List[bytes], start: float,
+                      interval: float, deadline: float, drain_timeout: float,
+                      histogram: LatencyHistogram, counters: Dict[str, int],
+                      compression: CompressionStats) -> FlowControlledSender:
+    """Send on a fixed schedule, recording latency from intended send time to ack"""
+    schedule = deque()
+    schedule_lock = threading.Lock()
+
+    def on_ack(seq):
+        now = time.perf_counter()
+        with schedule_lock:
+            while schedule and schedule[0][0] <= seq:
+                _, intended = schedule.popleft()
+                histogram.record(now - intended)
+                counters['acked'] += 1
+
+    sender = FlowControlledSender(on_ack)
+    sent = 0
+    pool = len(payloads)
+    try:
+        sender.attach(sock)
+        while True:
+            intended = start + sent * interval
+            if intended >= deadline:
+                break
+            now = time.perf_counter()
+            if now < intended:
+                time.sleep(intended - now)
+                now = time.perf_counter()
+
+            # Coalesce every message already due into one batch. Never skip
+            # or re-time a late message: its latency includes the whole time
+            # it spent waiting for credit or behind earlier sends.
+            due = []
+            while len(due) < sender.batch_size:
+                intended = start + (sent + len(due)) * interval
+                if intended > now or intended >= deadline:
+                    break
+                due.append(intended)
+
+            # Only this thread sends, so sequence numbers follow next_seq
+            with schedule_lock:
+                first = sender.next_seq
+                schedule.extend((first + i, t) for i, t in enumerate(due))
+            sender.send_many([payloads[(sent + i) % pool] for i in range(len(due))])
+            sent += len(due)
+        sender.wait_for_acks(drain_timeout)
+    except (OSError, ProtocolError) as e:
+        # ConnectionError, timeouts and EPIPE are all OSErrors
+        logger.warning(f"Connection lost after {sent} messages: {e}")
+        counters['errors'] += 1
+    finally:
+        counters['sent'] += sent
+        counters['unacked'] += sender.in_flight()
+        compression.merge(sender.stats)
+    return sender
+
+
+def _open_connections(mode: str, host: str, port: int, connections: int,
+                      transport: str = None, path: str = None) -> List[socket.socket]:
+    if mode == 'client':
+        return [connect(transport, host, port, path) for _ in range(connections)]
+
+    listener = create_listener(transport, host, port, path, backlog=connections)
+    try:
+        print(f"[Load Generator] Waiting for {connections} consumer(s) on "
+              f"{describe(transport, host, port, path)}")
+        socks = []
+        while len(socks) < connections:
+            conn, label = accept(listener)
+            print(f"[Load Generator] Consumer connected from {label}")
+            socks.append(conn)
+        return socks
+    finally:
+        close_listener(listener)
+
+
+def run_load(rate: float, connections: int = 1, duration: float = 10.0,
+             mode: str = 'server', host: str = None, port: int = None,
+             pool_size: int = 1000, seed: int = None, socks: List[socket.socket] = None,
+             drain_timeout: float = 10.0, transport: str = None,
+             path: str = None) -> Dict[str, object]:
+    """Offer `rate` messages/second for `duration` seconds and report results"""
+    if rate <= 0 or connections <= 0:
+        raise ValueError("Rate and connection count must be positive")
+    host = host or PROJECT_CONFIG['socket']['host']
+    port = port or PROJECT_CONFIG['socket']['port']
+
+    payloads = build_payloads(pool_size, seed)
+    own_socks = socks is None
+    if own_socks:
+        socks = _open_connections(mode, host, port, connections, transport, path)
+
+    # Each open connection carries an equal share, staggered so sends interleave
+    interval = len(socks) / rate
+    begin = time.perf_counter() + 0.1
+    deadline = begin + duration
+    histograms = [LatencyHistogram() for _ in socks]
+    compression = [CompressionStats() for _ in socks]
+    senders: List[FlowControlledSender] = [None] * len(socks)
+    counters = {'sent': 0, 'acked': 0, 'unacked': 0, 'errors': 0}
+    counter_lock = threading.Lock()
+
+    def worker(index):
+        local = {'sent': 0, 'acked': 0, 'unacked': 0, 'errors': 0}
+        try:
+            senders[index] = _drive_connection(
+                socks[index], payloads, begin + index * interval / len(socks),
+                interval, deadline, drain_timeout, histograms[index], local,
+                compression[index])
+        except Exception as e:
+            logger.error(f"Load generator connection {index} failed: {e}")
+            local['errors'] += 1
+        finally:
+            # Merge even after an unexpected error so the report stays complete
+            with counter_lock:
+                for key, value in local.items():
+                    counters[key] += value
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"LoadGen-{i}")
+               for i in range(len(socks))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+
+    if own_socks:
+        # Shut down before closing so the ack readers and the consumer's
+        # connection threads see the end of the stream
+        for sender, s in zip(senders, socks):
+            if sender is not None:
+                sender.close()
+            s.close()
+
+    histogram = LatencyHistogram()
+    for h in histograms:
+        histogram.merge(h)
+    compression_stats = CompressionStats()
+    for c in compression:
+        compression_stats.merge(c)
+
+    return {
+        'target_rate': rate,
+        'connections': len(socks),
+        'sent': counters['sent'],
+        'acked': counters['acked'],
+        'unacked': counters['unacked'],
+        'errors': counters['errors'],
+        'elapsed': elapsed,
+        'throughput': counters['acked'] / elapsed if elapsed > 0 else 0.0,
+        'histogram': histogram,
+        'compression': compression_stats
+    }
+
+
+def print_report(result: Dict[str, object]):
+    print("\n" + "=" * 60)
+    print("LOAD GENERATOR REPORT")
+    print(f"Target rate:   {result['target_rate']:.0f} msg/s over {result['connections']} connection(s)")
+    print(f"Messages sent: {result['sent']} in {result['elapsed']:.2f}s ({result['errors']} errors)")
+    print(f"Acknowledged:  {result['acked']} ({result['unacked']} unacknowledged at shutdown)")
+    print(f"Throughput:    {result['throughput']:.0f} msg/s acknowledged")
+    print(f"Compression:   {result['compression'].format()}")
+    print("Latency from intended send time to acknowledgement:")
+    print(result['histogram'].format())
+    print("=" * 60)
+
+
+def sweep(rates: Sequence[float], connections: int, duration: float, host: str, port: int,
+          p99_limit: float, seed: int = None, transport: str = None, path: str = None) -> float:
+    """Step through rates against a consumer server; return the highest sustained rate.
+
+    A rate counts as sustained when throughput stays within 5% of the target
+    and the p99 latency stays under `p99_limit` seconds.
+    """
+    best = 0.0
+    for rate in rates:
+        result = run_load(rate, connections, duration, 'client', host, port, seed=seed,
+                          transport=transport, path=path)
+        p99 = result['histogram'].percentile(99)
+        sustained = result['throughput'] >= rate * 0.95 and p99 <= p99_limit
+        print(f"rate={rate:8.0f}  throughput={result['throughput']:8.0f}  "
+              f"p99={p99 * 1000:9.3f}ms  {'OK' if sustained else 'SATURATED'}")
+        if not sustained:
+            break
+        best = rate
+    return best
+
+
+def main(argv=None):
+    config = PROJECT_CONFIG['loadgen']
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the socket consumer")
+    parser.add_argument('--mode', choices=['server', 'client'], default='server',
+                        help="server: run_client instances connect to us; "
+                             "client: connect to run_consumer_server")
+    parser.add_argument('--transport', choices=['tcp', 'unix'], default=None,
+                        help="defaults to PROJECT_CONFIG['socket']['transport']")
+    parser.add_argument('--path', default=None, help="unix socket path")
+    parser.add_argument('--host', default=PROJECT_CONFIG['socket']['host'])
+    parser.add_argument('--port', type=int, default=PROJECT_CONFIG['socket']['port'])
+    parser.add_argument('--rate', type=float, default=config['rate'], help="target messages/second")
+    parser.add_argument('--connections', type=int, default=config['connections'])
+    parser.add_argument('--duration', type=float, default=config['duration'], help="seconds per run")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--sweep', type=float, nargs='+', metavar='RATE',
+                        help="client mode: try each rate in turn and report the max sustained")
+    parser.add_argument('--p99-limit', type=float, default=config['p99_limit'],
+                        help="p99 latency (seconds) above which a sweep rate counts as saturated")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    try:
+        standalone_transport(args.transport)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.sweep:
+        if args.mode != 'client':
+            parser.error("--sweep needs --mode client (consumers must stay up between runs)")
+        best = sweep(sorted(args.sweep), args.connections, args.duration,
+                     args.host, args.port, args.p99_limit, args.seed, args.transport, args.path)
+        print(f"\nMax sustained rate: {best:.0f} msg/s")
+        return
+
+    print_report(run_load(args.rate, args.connections, args.duration, args.mode,
+                          args.host, args.port, seed=args.seed,
+                          transport=args.transport, path=args.path))
+
+
+if __name__ == "__main__":
+    main()
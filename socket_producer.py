@@ -1,6 +1,4 @@
-import socket
 import time
-import random
 import sys
 import os
 
@@ -10,51 +8,103 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # Add this folder to sys.path so Python looks here for modules
 sys.path.append(current_dir)
 
-# Now we can import ITStudent directly
-from ITStudent import ITStudent
+# Now we can import project modules directly
+from student_generator import StudentGenerator
+from socket_protocol import FlowControlledSender, ProtocolError
+from socket_transport import create_listener, accept, close_listener, describe, standalone_transport
+from profiling import Profiler
+from config.settings import PROJECT_CONFIG
 # --- FIX END ---
 
-PROGRAMMES = ["BSc IT", "Computer Science", "BSC", "BEng"]
-COURSES = ["CS101", "CS102", "MATH101", "ENG101", "DS201", "NET301"]
-
-def generate_student_xml():
-    name = random.choice(['Lungelo','Michael','Aisha','Sipho','Nokuthula','Thabo'])
-    student_id = ''.join(str(random.randint(0,9)) for _ in range(8))
-    programme = random.choice(PROGRAMMES)
-    num_courses = random.randint(3,5)
-    courses = random.sample(COURSES, num_courses)
-    marks = [random.randint(0,100) for _ in range(num_courses)]
-    
-    student = ITStudent(name, student_id, programme, courses, marks)
+NAMES = PROJECT_CONFIG['socket']['vocabulary']['names']
+PROGRAMMES = PROJECT_CONFIG['socket']['vocabulary']['programmes']
+COURSES = PROJECT_CONFIG['socket']['vocabulary']['courses']
+
+def make_generator(seed=None):
+    """Batch generator matching the socket demo's record shape"""
+    return StudentGenerator(
+        seed, names=NAMES, programmes=PROGRAMMES, courses=COURSES,
+        min_courses=3, max_courses=5, min_mark=0, max_mark=100,
+        id_prefix="", id_range=(0, 99999999)
+    )
+
+_default_generator = make_generator()
+
+def generate_student_xml(generator=None):
+    student = (generator or _default_generator).next_student()
     return student.to_xml_string()
 
-def run_server(host='127.0.0.1', port=9009, delay=1.0):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        # Allow reusing the address to avoid "Address already in use" errors
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
-        s.bind((host, port))
-        s.listen(1)
-        print(f"[Socket Producer] Listening on {host}:{port}")
+def _serve_connection(conn, label, sender, generator, delay, profiler) -> bool:
+    """Stream records to one consumer; return False if the producer should stop"""
+    print(f"[Socket Producer] Connection from {label}")
+    try:
+        sender.attach(conn)
+        print(f"[Socket Producer] Negotiated compression: {sender.codec.name}")
+        if sender.acked:
+            print(f"[Socket Producer] Resumed after record {sender.acked}")
+        while True:
+            with profiler.section("xml"):
+                xml = generate_student_xml(generator)
+                data = xml.encode('utf-8')
+            
+            # Blocks while the consumer has granted no credits; the sender
+            # times credit waits, compression and socket writes itself
+            seq = sender.send(data)
+            
+            with profiler.section("output"):
+                print(f"[Socket Producer] Sent student XML #{seq}")
+            with profiler.section("delay"):
+                time.sleep(delay)
+    except ConnectionError:
+        print(f"[Socket Producer] Connection closed by client. "
+              f"{sender.in_flight()} unacknowledged record(s) kept for resend.")
+        print(f"[Socket Producer] Compression ({sender.codec.name}): {sender.stats.format()}")
+        return True
+    except (ProtocolError, OSError) as e:
+        # A misbehaving or vanished peer only ends its own connection; the
+        # sender keeps unacknowledged records for the next consumer
+        print(f"[Socket Producer] Dropping connection from {label}: {e}. "
+              f"{sender.in_flight()} unacknowledged record(s) kept for resend.")
+        sender.close()
+        return True
+    except Exception as e:
+        print(f"[Socket Producer] Error: {e}")
+        return False
+
+def run_server(host='127.0.0.1', port=9009, delay=1.0, seed=None,
+               transport=None, path=None, sock=None, profiler: Profiler = None):
+    """Serve student records to consumers.
+
+    `transport` selects tcp or unix (see socket_transport); pass an already
+    connected `sock` (e.g. one end of a socketpair) to serve just that peer.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    generator = make_generator(seed)
+    # Sender state outlives each connection so a reconnecting consumer
+    # resumes after the last record it acknowledged
+    sender = FlowControlledSender(profiler=profiler)
+
+    if sock is not None:
+        with sock:
+            _serve_connection(sock, "socketpair", sender, generator, delay, profiler)
+        return
+
+    listener = create_listener(transport, host, port, path)
+    try:
+        print(f"[Socket Producer] Listening on {describe(transport, host, port, path)}")
         
-        conn, addr = s.accept()
-        with conn:
-            print(f"[Socket Producer] Connection from {addr}")
-            try:
-                while True:
-                    xml = generate_student_xml()
-                    data = xml.encode('utf-8')
-                    
-                    # Send length prefix (4 bytes, big endian) then the data
-                    conn.sendall(len(data).to_bytes(4, byteorder='big'))
-                    conn.sendall(data)
-                    
-                    print("[Socket Producer] Sent one student XML")
-                    time.sleep(delay)
-            except (BrokenPipeError, ConnectionResetError):
-                print("[Socket Producer] Connection closed by client.")
-            except Exception as e:
-                print(f"[Socket Producer] Error: {e}")
+        while True:
+            with profiler.section("accept"):
+                conn, label = accept(listener)
+            with conn:
+                if not _serve_connection(conn, label, sender, generator, delay, profiler):
+                    return
+    finally:
+        close_listener(listener)
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    try:
+        standalone_transport()
+    except ValueError as e:
+        sys.exit(f"[Socket Producer] {e}")
+    run_server()
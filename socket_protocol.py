@@ -0,0 +1,316 @@
+"""
+Length-prefixed framing shared by the socket producer, consumer and load
+generator. Each frame is a 4-byte big-endian length followed by the payload.
+
+Frame payloads start with a one-byte message type:
+
+- HELLO (consumer -> producer): last sequence number processed, initial
+  credits, bitmask of codecs it can decode, preset dictionary id
+- DATA  (producer -> consumer): sequence number, student XML
+- BATCH (producer -> consumer): first sequence number, record count, codec,
+  coalesced (and possibly compressed) records
+- ACK   (consumer -> producer): cumulative sequence acknowledged, credits granted
+
+Each record costs one credit, whether sent alone or in a batch. The producer
+may only have as many records outstanding as the consumer has granted, and
+keeps unacknowledged records so it can resend them after a reconnect.
+"""
+
+import socket
+import struct
+import threading
+import zlib
+import logging
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from socket_compression import (BatchCodec, CompressionStats, CODEC_NONE, decode_batch,
+                                negotiate, supported_codecs, dictionary_id)
+from profiling import Profiler
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 4
+
+MSG_HELLO = 1
+MSG_DATA = 2
+MSG_ACK = 3
+MSG_BATCH = 4
+
+_HELLO = struct.Struct('>BQIBI')
+_DATA = struct.Struct('>BQ')
+_ACK = struct.Struct('>BQI')
+_BATCH = struct.Struct('>BQHB')
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a frame that breaks the protocol"""
+
+
+def recv_all(sock: socket.socket, n: int) -> Optional[bytes]:
+    """Helper to ensure we receive exactly n bytes from the TCP stream."""
+    data = bytearray()
+    while len(data) < n:
+        packet = sock.recv(n - len(data))
+        if not packet:
+            return None
+        data += packet
+    return bytes(data)
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Return the payload with its length prefix"""
+    return len(payload).to_bytes(HEADER_SIZE, byteorder='big') + payload
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    """Send one length-prefixed frame"""
+    sock.sendall(encode_frame(payload))
+
+
+def recv_frame(sock: socket.socket) -> Optional[bytes]:
+    """Receive one length-prefixed frame, or None if the peer closed"""
+    raw_len = recv_all(sock, HEADER_SIZE)
+    if not raw_len:
+        return None
+    length = int.from_bytes(raw_len, byteorder='big')
+    if length == 0:
+        return b''
+    return recv_all(sock, length)
+
+
+def encode_hello(last_seq: int, credits: int, codecs: int = None,
+                 dict_id: int = None) -> bytes:
+    if codecs is None:
+        codecs = supported_codecs()
+    if dict_id is None:
+        dict_id = dictionary_id()
+    return _HELLO.pack(MSG_HELLO, last_seq, credits, codecs, dict_id)
+
+
+def encode_data(seq: int, body: bytes) -> bytes:
+    return _DATA.pack(MSG_DATA, seq) + body
+
+
+def encode_ack(seq: int, credits: int) -> bytes:
+    return _ACK.pack(MSG_ACK, seq, credits)
+
+
+def encode_batch(first_seq: int, bodies: List[bytes], codec: BatchCodec) -> bytes:
+    return _BATCH.pack(MSG_BATCH, first_seq, len(bodies), codec.codec) + codec.encode(bodies)
+
+
+def decode_hello(payload: bytes) -> Tuple[int, int, int, int]:
+    """Return (last_seq, credits, codecs, dict_id) from a HELLO payload"""
+    try:
+        msg_type, last_seq, credits, codecs, dict_id = _HELLO.unpack(payload)
+    except struct.error as e:
+        raise ProtocolError(f"Malformed HELLO: {e}")
+    if msg_type != MSG_HELLO:
+        raise ProtocolError(f"Expected HELLO, got message type {msg_type}")
+    return last_seq, credits, codecs, dict_id
+
+
+def decode_records(payload: bytes) -> List[Tuple[int, bytes]]:
+    """Return the (seq, body) records carried by a DATA or BATCH payload"""
+    msg_type = payload[0] if payload else None
+    try:
+        if msg_type == MSG_DATA:
+            _, seq = _DATA.unpack_from(payload)
+            return [(seq, payload[_DATA.size:])]
+        if msg_type == MSG_BATCH:
+            _, first_seq, count, codec = _BATCH.unpack_from(payload)
+            bodies = decode_batch(codec, payload[_BATCH.size:], count)
+            return [(first_seq + i, body) for i, body in enumerate(bodies)]
+    except (struct.error, ValueError, zlib.error) as e:
+        raise ProtocolError(f"Malformed frame of type {msg_type}: {e}")
+    raise ProtocolError(f"Unexpected message type {msg_type} from producer")
+
+
+def decode_ack(payload: bytes) -> Tuple[int, int]:
+    """Return (acknowledged seq, credits granted) from an ACK payload"""
+    try:
+        msg_type, seq, credits = _ACK.unpack(payload)
+    except struct.error as e:
+        raise ProtocolError(f"Malformed ACK: {e}")
+    if msg_type != MSG_ACK:
+        raise ProtocolError(f"Unexpected message type {msg_type} from consumer")
+    return seq, credits
+
+
+class ReceiverState:
+    """Consumer-side protocol state, kept across reconnects"""
+
+    def __init__(self, window: int = None, ack_every: int = None):
+        config = PROJECT_CONFIG['socket']
+        self.window = window or config['window']
+        if self.window <= 0:
+            raise ValueError("Window size must be positive")
+        # Acking less often than once per window would stall the producer
+        self.ack_every = min(ack_every or config['ack_every'], self.window)
+        self.last_seq = 0
+        self.duplicates = 0
+
+
+class FlowControlledSender:
+    """Producer side of the credit/acknowledgement protocol.
+
+    ``send()``/``send_many()`` block while the consumer has granted no
+    credits; records that are ready together go out as one BATCH frame,
+    compressed with the codec negotiated in ``attach()``. A reader thread
+    handles ACK frames; acknowledged records are released and the rest are
+    resent by the next ``attach()`` after a reconnect. ``close()`` shuts
+    the connection down and waits for the reader thread. With a `profiler`,
+    credit waits, encoding and socket writes are timed separately.
+    """
+
+    def __init__(self, on_ack: Callable[[int], None] = None,
+                 compression: str = None, batch_size: int = None,
+                 profiler: Profiler = None):
+        config = PROJECT_CONFIG['socket']
+        self.cond = threading.Condition()
+        self.next_seq = 1
+        self.acked = 0
+        self.unacked = deque()
+        self.credits = 0
+        self.sock = None
+        self.reader: Optional[threading.Thread] = None
+        self.connected = False
+        self.on_ack = on_ack
+        self.retransmitted = 0
+        self.connections = 0
+        self.compression = compression or config['compression']
+        self.batch_size = batch_size or config['batch_size']
+        self.profiler = profiler or Profiler(enabled=False)
+        self.stats = CompressionStats()
+        self.codec = BatchCodec(CODEC_NONE, stats=self.stats)
+
+    def attach(self, sock: socket.socket):
+        """Handshake on a new connection and resend unacknowledged records"""
+        payload = recv_frame(sock)
+        if payload is None:
+            raise ConnectionError("Peer closed before handshake")
+        last_seq, credits, codecs, dict_id = decode_hello(payload)
+
+        with self.cond:
+            self.sock = sock
+            self.connected = True
+            self.credits = credits
+            self.codec = BatchCodec(negotiate(codecs, dict_id, self.compression), stats=self.stats)
+            self._release(max(self.acked, last_seq))
+            # A consumer that has seen more than we sent (e.g. after a
+            # producer restart) must not treat new records as duplicates
+            self.next_seq = max(self.next_seq, self.acked + 1)
+            resend = list(self.unacked)
+
+        with self.cond:
+            self.connections += 1
+            # One reader per connection; distinct names keep their profiles apart
+            reader = threading.Thread(target=self.profiler.wrap(self._read_acks), args=(sock,),
+                                      daemon=True, name=f"SocketAckReader-{self.connections}")
+            self.reader = reader
+        reader.start()
+
+        logger.info(f"Consumer resumed after seq {self.acked}, window {credits}, "
+                    f"codec {self.codec.name}, resending {len(resend)} record(s)")
+        self._transmit(resend)
+        self.retransmitted += len(resend)
+
+    def send(self, body: bytes) -> int:
+        """Queue and transmit one record, waiting for credit if needed"""
+        return self.send_many([body])[0]
+
+    def send_many(self, bodies: List[bytes]) -> List[int]:
+        """Queue and transmit records, coalescing them into batches"""
+        with self.cond:
+            first = self.next_seq
+            self.next_seq += len(bodies)
+            records = [(first + i, body) for i, body in enumerate(bodies)]
+            self.unacked.extend(records)
+        self._transmit(records)
+        return [seq for seq, _ in records]
+
+    def wait_for_acks(self, timeout: float = None) -> bool:
+        """Block until every sent record is acknowledged or the peer is gone"""
+        with self.cond:
+            self.cond.wait_for(lambda: not self.unacked or not self.connected, timeout)
+            return not self.unacked
+
+    def in_flight(self) -> int:
+        with self.cond:
+            return len(self.unacked)
+
+    def close(self):
+        """Shut down the current connection and wait for its ack reader to exit"""
+        with self.cond:
+            sock, reader = self.sock, self.reader
+        if sock is not None:
+            # Unlike close(), shutdown() wakes the reader blocked in recv()
+            # and sends the consumer a FIN
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if reader is not None and reader is not threading.current_thread():
+            reader.join()
+
+    def _transmit(self, records: List[Tuple[int, bytes]]):
+        sent = 0
+        while sent < len(records):
+            with self.cond:
+                with self.profiler.section("credit_wait"):
+                    while self.credits <= 0 and self.connected:
+                        self.cond.wait()
+                if not self.connected:
+                    raise ConnectionError("Consumer disconnected")
+                count = min(self.credits, self.batch_size, len(records) - sent)
+                self.credits -= count
+                sock, codec = self.sock, self.codec
+
+            chunk = records[sent:sent + count]
+            with self.profiler.section("compress"):
+                if count == 1 and codec.codec == CODEC_NONE:
+                    payload = encode_data(*chunk[0])
+                else:
+                    payload = encode_batch(chunk[0][0], [body for _, body in chunk], codec)
+            try:
+                with self.profiler.section("socket_io"):
+                    send_frame(sock, payload)
+            except OSError:
+                self._disconnect(sock)
+                raise
+            sent += count
+
+    def _release(self, seq: int):
+        if seq > self.acked:
+            self.acked = seq
+        while self.unacked and self.unacked[0][0] <= seq:
+            self.unacked.popleft()
+
+    def _read_acks(self, sock: socket.socket):
+        try:
+            while True:
+                payload = recv_frame(sock)
+                if payload is None:
+                    break
+                seq, credits = decode_ack(payload)
+                with self.cond:
+                    if self.sock is not sock:
+                        # A late ack from a replaced connection
+                        break
+                    self._release(seq)
+                    self.credits += credits
+                    self.cond.notify_all()
+                if self.on_ack is not None:
+                    self.on_ack(seq)
+        except (OSError, ProtocolError) as e:
+            logger.debug(f"Ack reader stopped: {e}")
+        finally:
+            self._disconnect(sock)
+
+    def _disconnect(self, sock: socket.socket):
+        with self.cond:
+            if self.sock is sock:
+                self.connected = False
+                self.cond.notify_all()
@@ -0,0 +1,225 @@
+"""
+Transport selection for the socket producer and consumer.
+
+The framing in socket_protocol runs over any connected stream socket. This
+module creates those sockets for the configured transport:
+
+- tcp:        AF_INET stream socket on host:port
+- unix:       AF_UNIX stream socket at a filesystem path (same host only)
+- socketpair: pre-connected in-process pair (same process only)
+"""
+
+import itertools
+import os
+import socket
+import stat
+import threading
+import time
+import logging
+from typing import Tuple
+
+from config.settings import PROJECT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("tcp", "unix", "socketpair")
+
+# Unix peers have no address of their own, so accepted connections are numbered
+_unix_connection_ids = itertools.count(1)
+
+
+def _resolve(transport: str = None, host: str = None, port: int = None, path: str = None):
+    config = PROJECT_CONFIG['socket']
+    transport = transport or config['transport']
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport '{transport}', expected one of {TRANSPORTS}")
+    return (transport, host or config['host'], config['port'] if port is None else port,
+            path or config['unix_path'])
+
+
+def describe(transport: str = None, host: str = None, port: int = None, path: str = None) -> str:
+    """Human-readable endpoint label"""
+    transport, host, port, path = _resolve(transport, host, port, path)
+    if transport == "tcp":
+        return f"{host}:{port}"
+    if transport == "unix":
+        return f"unix:{path}"
+    return "socketpair"
+
+
+def standalone_transport(transport: str = None) -> str:
+    """Return the transport for a standalone producer or consumer process.
+
+    Raises ValueError if it is socketpair, which only links threads of one process.
+    """
+    transport = _resolve(transport)[0]
+    if transport == "socketpair":
+        raise ValueError("The socketpair transport only works inside one process (run_socket.py); "
+                         "set PROJECT_CONFIG['socket']['transport'] to tcp or unix "
+                         "to run this on its own")
+    return transport
+
+
+def _tune(sock: socket.socket) -> socket.socket:
+    # Small frames and acks should not wait for Nagle's algorithm
+    if sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def _is_stale_unix_socket(path: str) -> bool:
+    """True if `path` is a socket file with nothing listening on it"""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return False
+    except FileNotFoundError:
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    # Something is still listening there
+    return False
+
+
+def create_listener(transport: str = None, host: str = None, port: int = None,
+                    path: str = None, backlog: int = 1) -> socket.socket:
+    """Create a listening socket for the tcp or unix transport"""
+    transport, host, port, path = _resolve(transport, host, port, path)
+    if transport == "socketpair":
+        raise ValueError("The socketpair transport has no listener; use socket_pair()")
+
+    if transport == "unix":
+        # A stale socket file from an earlier run would make bind() fail.
+        # Anything else at the path (a live server, a regular file) is left
+        # alone and bind() reports it.
+        if _is_stale_unix_socket(path):
+            os.unlink(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+    else:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Allow reusing the address to avoid "Address already in use" errors
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((host, port))
+
+    listener.listen(backlog)
+    return listener
+
+
+def accept(listener: socket.socket) -> Tuple[socket.socket, str]:
+    """Accept a connection and return it with a printable peer label"""
+    conn, addr = listener.accept()
+    if isinstance(addr, tuple):
+        label = f"{addr[0]}:{addr[1]}"
+    else:
+        label = f"unix:{listener.getsockname()}#{next(_unix_connection_ids)}"
+    return _tune(conn), label
+
+
+def close_listener(listener: socket.socket):
+    """Close a listener, removing the unix socket file if there is one"""
+    path = listener.getsockname() if listener.family == socket.AF_UNIX else None
+    listener.close()
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+
+def connect(transport: str = None, host: str = None, port: int = None,
+            path: str = None) -> socket.socket:
+    """Connect to a producer or consumer listening on the tcp or unix transport"""
+    transport, host, port, path = _resolve(transport, host, port, path)
+    if transport == "socketpair":
+        raise ValueError("The socketpair transport cannot connect; use socket_pair()")
+
+    if transport == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    return _tune(socket.create_connection((host, port)))
+
+
+def socket_pair() -> Tuple[socket.socket, socket.socket]:
+    """Return a connected (producer, consumer) pair for in-process use"""
+    return socket.socketpair()
+
+
+def benchmark_transports(messages: int = 50000, window: int = None, seed: int = 0,
+                         compression: str = "none"):
+    """Stream the same records over every transport and report throughput.
+
+    The consumer side only decodes frames and acknowledges them, so the
+    figures reflect transport and framing cost rather than XML handling.
+    Compression is off by default so only the transports are compared.
+    """
+    import tempfile
+    from socket_protocol import (FlowControlledSender, ReceiverState, recv_frame, send_frame,
+                                 encode_hello, encode_ack, decode_records)
+    from socket_producer import make_generator
+
+    payloads = [student.to_xml_string().encode('utf-8')
+                for student in make_generator(seed).generate_many(1000)]
+    payload_bytes = sum(len(p) for p in payloads) * messages / len(payloads)
+
+    def consume(sock):
+        state = ReceiverState(window)
+        send_frame(sock, encode_hello(0, state.window))
+        received = unacked = 0
+        while received < messages:
+            records = decode_records(recv_frame(sock))
+            received += len(records)
+            unacked += len(records)
+            if unacked >= state.ack_every or received == messages:
+                send_frame(sock, encode_ack(records[-1][0], unacked))
+                unacked = 0
+
+    def produce(sock):
+        sender = FlowControlledSender(compression=compression, batch_size=1)
+        sender.attach(sock)
+        for i in range(messages):
+            sender.send(payloads[i % len(payloads)])
+        sender.wait_for_acks()
+        sender.close()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        unix_path = os.path.join(tmp_dir, "bench.sock")
+        for transport in TRANSPORTS:
+            if transport == "socketpair":
+                producer_sock, consumer_sock = socket_pair()
+            else:
+                listener = create_listener(transport, port=0, path=unix_path)
+                address = listener.getsockname()
+                consumer_sock = (connect(transport, host=address[0], port=address[1])
+                                 if transport == "tcp" else connect(transport, path=unix_path))
+                producer_sock, _ = accept(listener)
+                close_listener(listener)
+
+            start = time.perf_counter()
+            consumer = threading.Thread(target=consume, args=(consumer_sock,))
+            consumer.start()
+            produce(producer_sock)
+            consumer.join()
+            elapsed = time.perf_counter() - start
+            producer_sock.close()
+            consumer_sock.close()
+
+            results[transport] = messages / elapsed
+            print(f"{transport:<11} {messages / elapsed:>10,.0f} msg/s "
+                  f"{payload_bytes / elapsed / 1e6:>8.1f} MB/s")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    print("Benchmarking socket transports...")
+    benchmark_transports()